@@ -0,0 +1,108 @@
+import asyncio
+import functools
+from typing import Dict, Union, Callable
+
+from .exceptions import TelegramError
+from .ratelimit import Priority, current_priority
+from .webhook import current_webhook_reply
+
+
+class _Refresher:
+    __slots__ = ('task', 'users')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.users = 1
+
+
+class ChatActionKeeper:
+    """
+    Keeps chat actions ("typing", "upload_document", ...) alive while long handlers run, by sending
+    sendChatAction again every `interval` seconds. Handlers showing the same action in the same chat
+    share one refresher, which stops as soon as a message is sent to the chat.
+    """
+    def __init__(
+        self,
+        bot,
+        interval: float = 4.5,
+        ):
+        self.bot = bot
+        self.interval = interval
+        self.active: Dict[str, Dict[str, _Refresher]] = {} # chat_id -> action -> refresher
+
+    async def _refresh(self, chat_id, action: str):
+        # started by a handler, the actions are neither its webhook reply nor as urgent as its replies
+        current_webhook_reply.set(None)
+        current_priority.set(Priority.NORMAL)
+        try:
+            while True:
+                await self.bot.sendChatAction(chat_id, action)
+                await asyncio.sleep(self.interval)
+        except TelegramError:
+            pass # e.g. the bot was blocked, there is nothing left to show
+
+    def start(self, chat_id, action: str) -> _Refresher:
+        """Returns the refresher showing the action, to be given back to `stop`."""
+        actions = self.active.setdefault(str(chat_id), {})
+        refresher = actions.get(action)
+        if refresher is None:
+            refresher = actions[action] = _Refresher(asyncio.ensure_future(self._refresh(chat_id, action)))
+        else:
+            refresher.users += 1
+        return refresher
+
+    def stop(self, chat_id, action: str, refresher: _Refresher):
+        refresher.users -= 1
+        if refresher.users > 0:
+            return
+        refresher.task.cancel()
+        # a sent message may have replaced it with a refresher of other handlers
+        actions = self.active.get(str(chat_id), {})
+        if actions.get(action) is refresher:
+            del actions[action]
+            if not actions:
+                del self.active[str(chat_id)]
+
+    def message_sent(self, chat_id):
+        """Stops every action shown in the chat, the sent message replaces them."""
+        for refresher in self.active.pop(str(chat_id), {}).values():
+            refresher.task.cancel()
+
+
+class ChatAction:
+    """
+    Shows a chat action while a block or a handler runs, returned by `TelegramBot.chat_action`.
+    As a decorator, the chat is given by `chat_id` called with the arguments of the handler,
+    or taken from the `chat` of its first argument (e.g. a Message).
+    """
+    def __init__(
+        self,
+        keeper: ChatActionKeeper,
+        chat_id: Union[int, str, Callable],
+        action: str,
+        ):
+        self.keeper = keeper
+        self.chat_id = chat_id
+        self.action = action
+        self._refresher: _Refresher = None
+
+    async def __aenter__(self):
+        self._refresher = self.keeper.start(self.chat_id, self.action)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.keeper.stop(self.chat_id, self.action, self._refresher)
+        self._refresher = None
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        async def wrapped_func(*args, **kwargs):
+            if callable(self.chat_id):
+                chat_id = self.chat_id(*args, **kwargs)
+            elif self.chat_id is None:
+                chat_id = args[0].chat.id
+            else:
+                chat_id = self.chat_id
+            async with ChatAction(self.keeper, chat_id, self.action):
+                return await func(*args, **kwargs)
+        return wrapped_func
@@ -1,15 +1,43 @@
-from typing import Union, List
+import asyncio
+import time
+from datetime import datetime
+from typing import Union, List, Set, Dict, Callable, Awaitable, BinaryIO, AsyncIterator
 from collections import Iterable 
 
 import httpx
 import requests
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from dacite import from_dict
+from pydantic import ValidationError
 
 from .database import Database
 from .filters import FilterCollection, FilterCondition
 from .types import *
 from .handlers import ALL_HANDLERS
+from .ratelimit import RateLimiter, Priority, current_priority, is_rate_limited
+from .retry import RetryPolicy
+from .results import decode_result
+from .exceptions import TelegramError
+from .utils import json_loads, json_dumps
+from .broadcast import Broadcast, BroadcastProgress
+from .webhook import WebhookReply, current_webhook_reply
+from .files import MultipartUpload, FileIdCache, FileDownloader, CACHED_UPLOADS
+from .cache import ChatCache, CHAT_MUTATIONS, CHAT_SERVICE_FIELDS
+from .edits import EditCoalescer, COALESCED_EDITS
+from .actions import ChatActionKeeper, ChatAction
+from .encoders import api_method
+from .text import split_text, split_html, split_markdown, utf16_len, MAX_MESSAGE_LENGTH
+from .breaker import CircuitBreaker, CircuitOpenError, LatencyTracker, HEDGED_METHODS, DEFAULT_TIMEOUTS
+from .gallery import group_media, single_call, preload
+from .scheduler import Scheduler
+from .dispatcher import Dispatcher
+from .dedupe import UpdateWindow
+from .ingest import UpdateView
+
+# methods posting a new message in the chat of their `chat_id`
+MESSAGE_SENDING_PREFIXES = ("send", "forward", "copy")
 
 class TelegramBot:
     def __init__(
@@ -17,15 +45,82 @@ class TelegramBot:
         token: str,
         webhook: str = None,
         support_id: Union[str, int] = None,
-        database: Database= None
+        database: Database= None,
+        http2: bool = False,
+        limits: httpx.Limits = None,
+        timeout: Union[float, httpx.Timeout] = None,
+        rate_limiter: RateLimiter = None,
+        retry_policy: RetryPolicy = None,
+        raw_results: Union[bool, Set[str]] = False,
+        file_id_cache: FileIdCache = None,
+        max_downloads: int = 4,
+        chat_cache: ChatCache = None,
+        edit_coalescer: EditCoalescer = None,
+        split_long_messages: bool = False,
+        api_url: str = "https://api.telegram.org",
+        local_mode: bool = False,
+        timeouts: Dict[str, Union[float, httpx.Timeout]] = None,
+        circuit_breaker: CircuitBreaker = None,
+        hedging: bool = False,
+        warm_connections: int = 4,
+        readiness_path: str = None,
+        update_window: UpdateWindow = None,
         ):
         self.token = token
         self.support_id = support_id
         self.database = database
+        # a local Bot API server can be used instead of the cloud one, in its --local mode
+        # getFile returns absolute paths of its file system, which are read directly
+        self.api_url = api_url.rstrip('/')
+        self.local_mode = local_mode
+
+        # settings of the shared connection pool used for the Bot API calls
+        self.http2 = http2
+        self.limits = limits or httpx.Limits(
+            max_connections= 100,
+            max_keepalive_connections= 20,
+            keepalive_expiry= 60,
+        )
+        self.timeout = timeout if timeout is not None else httpx.Timeout(10, connect= 5)
+        self.client: httpx.AsyncClient = None
+        # timeout of each method, merged with DEFAULT_TIMEOUTS, a number sets the read timeout
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        # fails fast while the API is unhealthy, pass `circuit_breaker=False` to turn it off
+        self.circuit_breaker = CircuitBreaker() if circuit_breaker is None else circuit_breaker
+        # HEDGED_METHODS calls slower than their p95 latency are sent a second time
+        self.hedging = hedging
+        self.latencies = LatencyTracker()
+        # connections opened to the API on startup, before the first update comes
+        self.warm_connections = warm_connections
+        self.me: User = None
+        self._ready: asyncio.Event = None
+        # outbound flood control, pass `rate_limiter=False` to turn it off
+        self.rate_limiter = RateLimiter() if rate_limiter is None else rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        # methods returning the plain decoded dicts instead of the types of .types
+        self.raw_results = raw_results
+        # file_id of the uploaded contents, pass `file_id_cache=False` to always upload
+        if file_id_cache is None:
+            file_id_cache = FileIdCache(database.files if database else None)
+        self.file_id_cache = file_id_cache
+        self.downloader = FileDownloader(self, max_downloads)
+        # cache of the chat metadata lookups, pass `chat_cache=False` to turn it off
+        self.chat_cache = ChatCache() if chat_cache is None else chat_cache
+        # debounces the edits of a message, pass `edit_coalescer=False` to send every edit
+        self.edit_coalescer = EditCoalescer() if edit_coalescer is None else edit_coalescer
+        self.chat_actions = ChatActionKeeper(self)
+        # delayed calls, persisted in `Database.jobs`
+        self.scheduler = Scheduler(self, database.jobs if database else None)
+        # handles the webhook updates after they are acknowledged, see `listen`
+        self.dispatcher: Dispatcher = None
+        # drops the updates delivered again to the webhook, pass `update_window=False` to turn it off
+        self.update_window = UpdateWindow() if update_window is None else update_window
+        # sendMessage texts over 4096 characters are sent as several messages, which returns a list
+        self.split_long_messages = split_long_messages
 
         if webhook:
             r = requests.get(
-                f'https://api.telegram.org/bot{self.token}'
+                f'{self.api_url}/bot{self.token}'
                 f'/setWebhook?url={webhook}')
             assert r.status_code == 200, f"Couldn't set the webhook. {r.content}"
 
@@ -33,22 +128,499 @@ class TelegramBot:
             setattr(self, handler.__name__, handler)
 
         self.app = FastAPI()
-        
+        self.app.add_event_handler("startup", self.startup)
+        self.app.add_event_handler("shutdown", self.shutdown)
+        if readiness_path:
+            # answers 503 until the startup is done, for the health checks of the deployments
+            self.app.get(readiness_path)(self._readiness)
+
+
+    def _open_client(self) -> httpx.AsyncClient:
+        if self.client is None or self.client.is_closed:
+            self.client = httpx.AsyncClient(
+                http2= self.http2,
+                limits= self.limits,
+                timeout= self.timeout,
+            )
+        return self.client
+
+    async def startup(self):
+        """
+        Opens the pooled HTTP client shared by all the Bot API calls and warms it up. Runs on the startup of `self.app`.
+        """
+        self._open_client()
+        await self.warm_up()
+        await self.scheduler.start()
+
+    async def warm_up(self):
+        """
+        Opens `warm_connections` connections to the API while calling getMe, whose result is kept in `self.me`,
+        and pings the database. The bot is ready once they are done, an invalid token or an unreachable
+        database raise here instead of on the first update.
+        """
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        client = self._open_client()
+        url = f"{self.api_url}/bot{self.token}/getMe"
+        # concurrent calls can't share a connection, each of them opens one, kept alive by the pool
+        count = self.warm_connections
+        if self.limits.max_keepalive_connections is not None:
+            count = min(count, self.limits.max_keepalive_connections)
+        warmers = [client.post(url) for _ in range(max(count, 1))]
+        if self.database:
+            warmers.append(asyncio.get_event_loop().run_in_executor(None, self.database.ping))
+        responses = await asyncio.gather(*warmers)
+
+        data = self._parse_response(responses[0])
+        if not data.get('ok'):
+            raise TelegramError("getMe", data.get('error_code', responses[0].status_code), data.get('description'))
+        self.me = decode_result("getMe", data['result'])
+        self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the startup is done."""
+        return self._ready is not None and self._ready.is_set()
+
+    async def wait_ready(self):
+        """Waits until the startup is done."""
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        await self._ready.wait()
+
+    async def _readiness(self):
+        if not self.ready:
+            return JSONResponse({'ready': False}, status_code= 503)
+        return {'ready': True}
+
+    async def shutdown(self):
+        """
+        Closes the pooled HTTP client. Runs on the shutdown of `self.app`.
+        """
+        await self.scheduler.stop()
+        if self.dispatcher is not None:
+            await self.dispatcher.stop()
+        if self._ready is not None:
+            self._ready.clear()
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
 
     async def __call__(
         self,
         method: str,
         json_data: dict,
         ):
-        async with httpx.AsyncClient() as client:
-            r = await client.post(
-                f"https://api.telegram.org/bot{self.token}/{method}",
-                json=json_data,
-            )
+        if self.chat_cache and method in self.chat_cache.ttls:
+            return await self.chat_cache.get(method, json_data, lambda: self._request(method, json_data))
+        if self.edit_coalescer and method in COALESCED_EDITS:
+            return await self.edit_coalescer.edit(method, json_data, lambda params: self._request(method, params))
+        if self.chat_actions.active and method.startswith(MESSAGE_SENDING_PREFIXES) and method != "sendChatAction":
+            self.chat_actions.message_sent(json_data['chat_id'])
+        if (
+            self.split_long_messages and method == "sendMessage"
+            and utf16_len(json_data['text']) > MAX_MESSAGE_LENGTH
+        ):
+            return await self._send_long_message(json_data)
+        result = await self._request(method, json_data)
+        if self.chat_cache and method in CHAT_MUTATIONS:
+            self.chat_cache.invalidate(json_data['chat_id'])
+        return result
+
+    async def _request(
+        self,
+        method: str,
+        json_data: dict,
+        reserved: bool = False,
+        ):
+        # `reserved` calls took their first rate limiter slot ahead of time
+        limited = self.rate_limiter and is_rate_limited(method)
+        cached_uploads = None
+        if self.file_id_cache and json_data and (method in CACHED_UPLOADS or method == "sendMediaGroup"):
+            json_data, cached_uploads = await self.file_id_cache.substitute(method, json_data)
+
+        # calls with InputFile parameters are streamed as multipart/form-data
+        upload = MultipartUpload.from_params(json_data) if json_data else None
+
+        reply = current_webhook_reply.get()
+        if reply is not None:
+            # the held call goes out before this one, only the last call of the handlers is in the response
+            await self._send_held_call(reply)
+        if reply is not None and upload is None and reply.claim(method, json_data):
+            # sent by Telegram once the webhook is answered, its result is unknown
+            if limited and not reserved:
+                await self.rate_limiter.acquire((json_data or {}).get('chat_id'))
+            return None
+
+        timeout = self._timeout(method, json_data)
+        hedged = self.hedging and method in HEDGED_METHODS
+        attempt = 0
+        while True:
+            if self.circuit_breaker:
+                # the handlers of live updates rather fail than wait for the API to recover
+                await self.circuit_breaker.acquire(method, urgent= current_priority.get() <= Priority.INTERACTIVE)
+            if limited and not reserved:
+                await self.rate_limiter.acquire((json_data or {}).get('chat_id'))
+            reserved = False
+
+            # the client is opened lazily if the bot is used outside of `self.app`
+            client = self._open_client()
+            url = f"{self.api_url}/bot{self.token}/{method}"
+            started = time.monotonic()
+            try:
+                if upload is not None:
+                    r = await client.post(url, content= upload.stream(), headers= upload.headers, timeout= timeout)
+                else:
+                    # nested TelegramType parameters are serialized by json_dumps
+                    post = lambda: client.post(
+                        url,
+                        content= json_dumps(json_data) if json_data else None,
+                        headers= {'Content-Type': 'application/json'},
+                        timeout= timeout,
+                    )
+                    r = await (self._hedge(method, post) if hedged else post())
+            except httpx.TransportError as e:
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_failure()
+                delay = self.retry_policy.on_error(method, attempt, e)
+                if upload is not None and not upload.replayable:
+                    delay = None
+                if delay is None:
+                    raise
+            else:
+                if self.circuit_breaker:
+                    if r.status_code >= 500:
+                        self.circuit_breaker.record_failure()
+                    else:
+                        self.circuit_breaker.record_success()
+                if hedged and r.status_code < 500:
+                    self.latencies.record(method, time.monotonic() - started)
+                data = self._parse_response(r)
+                if r.status_code == 200:
+                    break
+                delay = self.retry_policy.on_response(method, attempt, r.status_code, data)
+                if upload is not None and not upload.replayable:
+                    delay = None
+                if delay is None:
+                    break
+            attempt += 1
+            await asyncio.sleep(delay)
 
         if self.database:
-            self.database.add_sent(r)
+            self.database.add_sent(data)
+
+        if not data.get('ok'):
+            parameters = data.get('parameters')
+            raise TelegramError(
+                method,
+                data.get('error_code', r.status_code),
+                data.get('description'),
+                ResponseParameters(**parameters) if parameters else None,
+            )
+        if cached_uploads:
+            self.file_id_cache.store(cached_uploads, data['result'])
+        if self.raw_results is True or (self.raw_results and method in self.raw_results):
+            return data['result']
+        return decode_result(method, data['result'])
 
+    def _timeout(
+        self,
+        method: str,
+        json_data: dict,
+        ) -> Union[httpx.Timeout, float]:
+        timeout = self.timeouts.get(method, self.timeout)
+        if not isinstance(timeout, httpx.Timeout):
+            timeout = httpx.Timeout(timeout, connect= min(timeout, 5))
+        if method == "getUpdates" and json_data and json_data.get('timeout'):
+            # long polling holds the response back for up to `timeout` seconds
+            timeout = httpx.Timeout(
+                connect= timeout.connect,
+                read= (timeout.read or 0) + json_data['timeout'],
+                write= timeout.write,
+                pool= timeout.pool,
+            )
+        return timeout
+
+    async def _hedge(
+        self,
+        method: str,
+        post: Callable[[], Awaitable[httpx.Response]],
+        ) -> httpx.Response:
+        """
+        Sends the call a second time if it takes longer than the p95 latency of the method,
+        and returns the first response. The other attempt is cancelled.
+        """
+        delay = self.latencies.p95(method)
+        first = asyncio.ensure_future(post())
+        if delay is None:
+            return await first
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout= delay)
+            if not done:
+                pending.add(asyncio.ensure_future(post()))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when= asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _send_long_message(self, params: dict) -> List[Message]:
+        """
+        Sends a text over the length limit as several messages, in order. The slot of the rate limiter
+        for the next chunk is taken while the current one is in flight, so chunks follow each other
+        as soon as the previous one is delivered. Only the first chunk replies to `reply_to_message_id`
+        and only the last one gets the `reply_markup`.
+        """
+        parse_mode = (params.get('parse_mode') or '').upper()
+        if parse_mode == "HTML":
+            chunks = [(text, None) for text in split_html(params['text'])]
+        elif parse_mode in ("MARKDOWN", "MARKDOWNV2"):
+            version = 2 if parse_mode == "MARKDOWNV2" else 1
+            chunks = [(text, None) for text in split_markdown(params['text'], version= version)]
+        else:
+            chunks = split_text(params['text'], params.get('entities'))
+
+        chat_id = params['chat_id']
+        await self._close_webhook_reply()
+        limited = bool(self.rate_limiter)
+        messages = []
+        slot = asyncio.ensure_future(self.rate_limiter.acquire(chat_id)) if limited else None
+        try:
+            for i, (text, entities) in enumerate(chunks):
+                chunk_params = {**params, 'text': text}
+                chunk_params.pop('entities', None)
+                if entities:
+                    chunk_params['entities'] = entities
+                if i > 0:
+                    chunk_params.pop('reply_to_message_id', None)
+                    chunk_params.pop('allow_sending_without_reply', None)
+                if i < len(chunks) - 1:
+                    chunk_params.pop('reply_markup', None)
+
+                if slot is not None:
+                    await slot
+                sending = asyncio.ensure_future(self._request("sendMessage", chunk_params, reserved= limited))
+                slot = None
+                if limited and i < len(chunks) - 1:
+                    slot = asyncio.ensure_future(self.rate_limiter.acquire(chat_id))
+                messages.append(await sending)
+        finally:
+            if slot is not None:
+                slot.cancel()
+        return messages
+
+    async def sendGallery(
+        self,
+        chat_id: Union[int, str],
+        media: List[Union[InputMediaPhoto, InputMediaVideo, InputMediaDocument, InputMediaAudio, InputMediaAnimation]],
+        disable_notification: bool = None,
+        reply_to_message_id: int = None,
+        allow_sending_without_reply: bool = None,
+        preload_size: int = 10 * 1024 * 1024,
+        ) -> List[Message]:
+        """
+        Sends any number of media as albums of 2-10 items, photos and videos can be mixed while documents
+        and audios are only grouped with their own type. A media that can't be grouped is sent alone.
+        The files of the next album are read while the current one is sent. Returns the sent Messages in order.
+
+        Keyword arguments:
+
+        :param chat_id (Integer or String): Unique identifier for the target chat or username of the target channel (in the format @channelusername)
+        :param media (Array of InputMediaPhoto, InputMediaVideo, InputMediaDocument, InputMediaAudio and InputMediaAnimation): The media to send, in order
+        :param disable_notification (Boolean, Optional): Sends the messages silently. Users will receive a notification with no sound.
+        :param reply_to_message_id (Integer, Optional): If the first album is a reply, ID of the original message
+        :param allow_sending_without_reply (Boolean, Optional): Pass True, if the first album should be sent even if the specified replied-to message is not found
+        :param preload_size (Integer, Optional): Files up to this size in bytes are read in memory ahead of their album. Defaults to 10 MB.
+        """
+        groups = group_media(media)
+        if not groups:
+            return []
+        params = {
+            'chat_id': chat_id,
+            'disable_notification': disable_notification,
+            'reply_to_message_id': reply_to_message_id,
+            'allow_sending_without_reply': allow_sending_without_reply,
+        }
+        params = {k: v for k, v in params.items() if v is not None}
+        if self.chat_actions.active:
+            self.chat_actions.message_sent(chat_id)
+        await self._close_webhook_reply()
+
+        prepare = lambda group: asyncio.gather(*(preload(item, preload_size) for item in group))
+        limited = bool(self.rate_limiter)
+        messages = []
+        prepared = asyncio.ensure_future(prepare(groups[0]))
+        slot = asyncio.ensure_future(self.rate_limiter.acquire(chat_id)) if limited else None
+        try:
+            for i in range(len(groups)):
+                group = await prepared
+                prepared = asyncio.ensure_future(prepare(groups[i + 1])) if i < len(groups) - 1 else None
+
+                group_params = dict(params)
+                if i > 0:
+                    group_params.pop('reply_to_message_id', None)
+                    group_params.pop('allow_sending_without_reply', None)
+                if len(group) == 1:
+                    method, media_params = single_call(group[0])
+                    group_params.update(media_params)
+                else:
+                    method = "sendMediaGroup"
+                    group_params['media'] = group
+
+                if slot is not None:
+                    await slot
+                sending = asyncio.ensure_future(self._request(method, group_params, reserved= limited))
+                slot = None
+                if limited and i < len(groups) - 1:
+                    slot = asyncio.ensure_future(self.rate_limiter.acquire(chat_id))
+                result = await sending
+                messages.extend(result if isinstance(result, list) else [result])
+        finally:
+            for task in (slot, prepared):
+                if task is not None:
+                    task.cancel()
+        return messages
+
+    async def _close_webhook_reply(self):
+        # a claimed call is sent after the handler returns, it would break the order of a sequence of calls
+        reply = current_webhook_reply.get()
+        if reply is not None:
+            reply.closed = True
+            await self._send_held_call(reply)
+
+    async def _send_held_call(self, reply: WebhookReply):
+        held = reply.release()
+        if held is not None:
+            # sent on its own, it took its rate limiter slot when it was claimed
+            token = current_webhook_reply.set(None)
+            try:
+                await self._request(*held, reserved= True)
+            finally:
+                current_webhook_reply.reset(token)
+
+    async def broadcast(
+        self,
+        name: str,
+        method: str = "sendMessage",
+        query: dict = None,
+        concurrency: int = 20,
+        checkpoint_every: int = 100,
+        on_progress: Callable[[BroadcastProgress], None] = None,
+        **params,
+        ) -> BroadcastProgress:
+        """
+        Calls `method` for every user of the database, e.g. `await bot.broadcast("news-42", text= "...")`.
+        Runs with the same name resume where the previous one stopped. Returns the final BroadcastProgress.
+
+        Keyword arguments:
+
+        :param name (String): Unique name of the broadcast, the key of its checkpoint
+        :param method (String, Optional): The method called with `chat_id` set to each user. Defaults to sendMessage.
+        :param query (Dict, Optional): Mongo query selecting the recipients among `Database.users`
+        :param concurrency (Integer, Optional): Number of calls in flight at once. Defaults to 20.
+        :param checkpoint_every (Integer, Optional): Number of handled recipients between two checkpoints. Defaults to 100.
+        :param on_progress (Callable, Optional): Called with the BroadcastProgress at every checkpoint
+        :param params: The other arguments of `method`
+        """
+        # the call held for the webhook response would only be sent after the broadcast
+        await self._close_webhook_reply()
+        return await Broadcast(
+            self, name, method, query, concurrency, checkpoint_every, on_progress, **params
+        ).run()
+
+    def schedule(
+        self,
+        when: Union[float, datetime],
+        method: str,
+        **params,
+        ) -> str:
+        """
+        Calls `method` later, e.g. `bot.schedule(60, "deleteMessage", chat_id= chat_id, message_id= message_id)`.
+        Jobs survive restarts if a database is set. Returns the id of the job.
+
+        Keyword arguments:
+
+        :param when (Float or datetime): Seconds from now, or the time of the call
+        :param method (String): The method to call
+        :param params: The arguments of `method`
+        """
+        return self.scheduler.schedule(when, method, params)
+
+    def unschedule(
+        self,
+        job_id: str,
+        ) -> bool:
+        """
+        Cancels a job of `schedule`. Returns False if it was already made or cancelled.
+
+        Keyword arguments:
+
+        :param job_id (String): The id returned by `schedule`
+        """
+        return self.scheduler.cancel(job_id)
+
+    def chat_action(
+        self,
+        chat_id: Union[int, str, Callable] = None,
+        action: str = "typing",
+        ) -> ChatAction:
+        """
+        Keeps a chat action alive until the first message is sent to the chat, or the block or handler ends.
+        Use it as `async with bot.chat_action(chat_id, "upload_document"): ...` or decorate a handler
+        with `@bot.chat_action(action= "typing")`.
+
+        Keyword arguments:
+
+        :param chat_id (Integer, String or Callable, Optional): The target chat. For handlers, a function of their arguments returning it, defaults to the chat of their first argument.
+        :param action (String, Optional): Type of action to broadcast, see sendChatAction. Defaults to "typing".
+        """
+        return ChatAction(self.chat_actions, chat_id, action)
+
+    async def download(
+        self,
+        file_id: str,
+        dest: Union[str, BinaryIO],
+        ):
+        """
+        Downloads a file into `dest`, a path or a file opened in binary mode, in chunks. Returns `dest`.
+        Simultaneous downloads of a file to the same path are done once.
+
+        Keyword arguments:
+
+        :param file_id (String): File identifier to download
+        :param dest (String or File object): Where the file is written
+        """
+        return await self.downloader.download(file_id, dest)
+
+    def iter_download(
+        self,
+        file_id: str,
+        ) -> AsyncIterator[bytes]:
+        """
+        Downloads a file as an async iterator of chunks, e.g. `async for chunk in bot.iter_download(file_id): ...`
+
+        Keyword arguments:
+
+        :param file_id (String): File identifier to download
+        """
+        return self.downloader.iter_chunks(file_id)
+
+    @staticmethod
+    def _parse_response(r: httpx.Response) -> dict:
+        try:
+            return json_loads(r.content)
+        except ValueError:
+            # e.g. an html error page of a proxy
+            return {'ok': False, 'error_code': r.status_code, 'description': r.text}
+
+    @api_method
     def getUpdates(
         self,
         offset: int = None,
@@ -66,9 +638,8 @@ class TelegramBot:
         :param timeout (Integer, Optional): Timeout in seconds for long polling. Defaults to 0, i.e. usual short polling. Should be positive, short polling should be used for testing purposes only.
         :param allowed_updates (Array of String, Optional): A JSON-serialized list of the update types you want your bot to receive. For example, specify [\xe2\x80\x9cmessage\xe2\x80\x9d, \xe2\x80\x9cedited_channel_post\xe2\x80\x9d, \xe2\x80\x9ccallback_query\xe2\x80\x9d] to only receive updates of these types. See Update for a complete list of available update types. Specify an empty list to receive all update types except chat_member (default). If not specified, the previous setting will be used.Please note that this parameter doesn't affect updates created before the call to the getUpdates, so unwanted updates may be received for a short period of time.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("getUpdates", kwargs)
 
+    @api_method
     def setWebhook(
         self,
         url: str,
@@ -91,9 +662,8 @@ class TelegramBot:
         :param allowed_updates (Array of String, Optional): A JSON-serialized list of the update types you want your bot to receive. For example, specify [\xe2\x80\x9cmessage\xe2\x80\x9d, \xe2\x80\x9cedited_channel_post\xe2\x80\x9d, \xe2\x80\x9ccallback_query\xe2\x80\x9d] to only receive updates of these types. See Update for a complete list of available update types. Specify an empty list to receive all update types except chat_member (default). If not specified, the previous setting will be used.Please note that this parameter doesn't affect updates created before the call to the setWebhook, so unwanted updates may be received for a short period of time.
         :param drop_pending_updates (Boolean, Optional): Pass True to drop all pending updates
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("setWebhook", kwargs)
 
+    @api_method
     def deleteWebhook(
         self,
         drop_pending_updates: bool = None,
@@ -105,37 +675,36 @@ class TelegramBot:
         
         :param drop_pending_updates (Boolean, Optional): Pass True to drop all pending updates
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("deleteWebhook", kwargs)
 
+    @api_method
     def getWebhookInfo(self):
         """
         Use this method to get current webhook status. Requires no parameters. On success, returns a WebhookInfo object. If the bot is using getUpdates, will return an object with the url field empty.
         """
-        return self("getWebhookInfo", None)
 
 
+    @api_method
     def getMe(self):
         """
         A simple method for testing your bot's auth token. Requires no parameters. Returns basic information about the bot in form of a User object.
         """
-        return self("getMe", None)
 
 
+    @api_method
     def logOut(self):
         """
         Use this method to log out from the cloud Bot API server before launching the bot locally. You must log out the bot before running it locally, otherwise there is no guarantee that the bot will receive updates. After a successful call, you can immediately log in on a local server, but will not be able to log in back to the cloud Bot API server for 10 minutes. Returns True on success. Requires no parameters.
         """
-        return self("logOut", None)
 
 
+    @api_method
     def close(self):
         """
         Use this method to close the bot instance before moving it from one local server to another. You need to delete the webhook before calling this method to ensure that the bot isn't launched again after server restart. The method will return error 429 in the first 10 minutes after the bot is launched. Returns True on success. Requires no parameters.
         """
-        return self("close", None)
 
 
+    @api_method
     def sendMessage(
         self,
         chat_id: Union[int, str],
@@ -163,12 +732,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {
-            k:v.json(exclude_unset= True) if isinstance(v, TelegramType) else v 
-            for k,v in locals().items() if k!='self' and v!=None
-        }
-        return self("sendMessage", kwargs)
 
+    @api_method
     def forwardMessage(
         self,
         chat_id: Union[int, str],
@@ -186,9 +751,8 @@ class TelegramBot:
         :param message_id (Integer): Message identifier in the chat specified in from_chat_id
         :param disable_notification (Boolean, Optional): Sends the message silently. Users will receive a notification with no sound.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("forwardMessage", kwargs)
 
+    @api_method
     def copyMessage(
         self,
         chat_id: Union[int, str],
@@ -218,9 +782,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("copyMessage", kwargs)
 
+    @api_method
     def sendPhoto(
         self,
         chat_id: Union[int, str],
@@ -248,9 +811,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendPhoto", kwargs)
 
+    @api_method
     def sendAudio(
         self,
         chat_id: Union[int, str],
@@ -287,9 +849,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendAudio", kwargs)
 
+    @api_method
     def sendDocument(
         self,
         chat_id: Union[int, str],
@@ -321,9 +882,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendDocument", kwargs)
 
+    @api_method
     def sendVideo(
         self,
         chat_id: Union[int, str],
@@ -361,9 +921,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendVideo", kwargs)
 
+    @api_method
     def sendAnimation(
         self,
         chat_id: Union[int, str],
@@ -399,9 +958,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendAnimation", kwargs)
 
+    @api_method
     def sendVoice(
         self,
         chat_id: Union[int, str],
@@ -431,9 +989,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendVoice", kwargs)
 
+    @api_method
     def sendVideoNote(
         self,
         chat_id: Union[int, str],
@@ -461,9 +1018,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendVideoNote", kwargs)
 
+    @api_method
     def sendMediaGroup(
         self,
         chat_id: Union[int, str],
@@ -483,9 +1039,8 @@ class TelegramBot:
         :param reply_to_message_id (Integer, Optional): If the messages are a reply, ID of the original message
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendMediaGroup", kwargs)
 
+    @api_method
     def sendLocation(
         self,
         chat_id: Union[int, str],
@@ -517,9 +1072,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendLocation", kwargs)
 
+    @api_method
     def editMessageLiveLocation(
         self,
         latitude: float,
@@ -547,9 +1101,8 @@ class TelegramBot:
         :param proximity_alert_radius (Integer, Optional): Maximum distance for proximity alerts about approaching another chat member, in meters. Must be between 1 and 100000 if specified.
         :param reply_markup (InlineKeyboardMarkup, Optional): A JSON-serialized object for a new inline keyboard.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("editMessageLiveLocation", kwargs)
 
+    @api_method
     def stopMessageLiveLocation(
         self,
         chat_id: Union[int, str] = None,
@@ -567,9 +1120,8 @@ class TelegramBot:
         :param inline_message_id (String, Optional): Required if chat_id and message_id are not specified. Identifier of the inline message
         :param reply_markup (InlineKeyboardMarkup, Optional): A JSON-serialized object for a new inline keyboard.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("stopMessageLiveLocation", kwargs)
 
+    @api_method
     def sendVenue(
         self,
         chat_id: Union[int, str],
@@ -605,9 +1157,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendVenue", kwargs)
 
+    @api_method
     def sendContact(
         self,
         chat_id: Union[int, str],
@@ -635,9 +1186,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendContact", kwargs)
 
+    @api_method
     def sendPoll(
         self,
         chat_id: Union[int, str],
@@ -681,9 +1231,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendPoll", kwargs)
 
+    @api_method
     def sendDice(
         self,
         chat_id: Union[int, str],
@@ -705,9 +1254,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendDice", kwargs)
 
+    @api_method
     def sendChatAction(
         self,
         chat_id: Union[int, str],
@@ -723,9 +1271,8 @@ class TelegramBot:
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target channel (in the format @channelusername)
         :param action (String): Type of action to broadcast. Choose one, depending on what the user is about to receive: typing for text messages, upload_photo for photos, record_video or upload_video for videos, record_voice or upload_voice for voice notes, upload_document for general files, find_location for location data, record_video_note or upload_video_note for video notes.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendChatAction", kwargs)
 
+    @api_method
     def getUserProfilePhotos(
         self,
         user_id: int,
@@ -741,9 +1288,8 @@ class TelegramBot:
         :param offset (Integer, Optional): Sequential number of the first photo to be returned. By default, all photos are returned.
         :param limit (Integer, Optional): Limits the number of photos to be retrieved. Values between 1-100 are accepted. Defaults to 100.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("getUserProfilePhotos", kwargs)
 
+    @api_method
     def getFile(
         self,
         file_id: str,
@@ -755,9 +1301,8 @@ class TelegramBot:
         
         :param file_id (String): File identifier to get info about
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("getFile", kwargs)
 
+    @api_method
     def banChatMember(
         self,
         chat_id: Union[int, str],
@@ -775,9 +1320,8 @@ class TelegramBot:
         :param until_date (Integer, Optional): Date when the user will be unbanned, unix time. If user is banned for more than 366 days or less than 30 seconds from the current time they are considered to be banned forever. Applied for supergroups and channels only.
         :param revoke_messages (Boolean, Optional): Pass True to delete all messages from the chat for the user that is being removed. If False, the user will be able to see messages in the group that were sent before the user was removed. Always True for supergroups and channels.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("banChatMember", kwargs)
 
+    @api_method
     def unbanChatMember(
         self,
         chat_id: Union[int, str],
@@ -793,9 +1337,8 @@ class TelegramBot:
         :param user_id (Integer): Unique identifier of the target user
         :param only_if_banned (Boolean, Optional): Do nothing if the user is not banned
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("unbanChatMember", kwargs)
 
+    @api_method
     def restrictChatMember(
         self,
         chat_id: Union[int, str],
@@ -813,9 +1356,8 @@ class TelegramBot:
         :param permissions (ChatPermissions): A JSON-serialized object for new user permissions
         :param until_date (Integer, Optional): Date when restrictions will be lifted for the user, unix time. If user is restricted for more than 366 days or less than 30 seconds from the current time, they are considered to be restricted forever
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("restrictChatMember", kwargs)
 
+    @api_method
     def promoteChatMember(
         self,
         chat_id: Union[int, str],
@@ -851,9 +1393,8 @@ class TelegramBot:
         :param can_invite_users (Boolean, Optional): Pass True, if the administrator can invite new users to the chat
         :param can_pin_messages (Boolean, Optional): Pass True, if the administrator can pin messages, supergroups only
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("promoteChatMember", kwargs)
 
+    @api_method
     def setChatAdministratorCustomTitle(
         self,
         chat_id: Union[int, str],
@@ -869,9 +1410,8 @@ class TelegramBot:
         :param user_id (Integer): Unique identifier of the target user
         :param custom_title (String): New custom title for the administrator; 0-16 characters, emoji are not allowed
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("setChatAdministratorCustomTitle", kwargs)
 
+    @api_method
     def setChatPermissions(
         self,
         chat_id: Union[int, str],
@@ -885,9 +1425,8 @@ class TelegramBot:
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target supergroup (in the format @supergroupusername)
         :param permissions (ChatPermissions): New default chat permissions
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("setChatPermissions", kwargs)
 
+    @api_method
     def exportChatInviteLink(
         self,
         chat_id: Union[int, str],
@@ -899,9 +1438,8 @@ class TelegramBot:
         
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target channel (in the format @channelusername)
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("exportChatInviteLink", kwargs)
 
+    @api_method
     def createChatInviteLink(
         self,
         chat_id: Union[int, str],
@@ -917,9 +1455,8 @@ class TelegramBot:
         :param expire_date (Integer, Optional): Point in time (Unix timestamp) when the link will expire
         :param member_limit (Integer, Optional): Maximum number of users that can be members of the chat simultaneously after joining the chat via this invite link; 1-99999
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("createChatInviteLink", kwargs)
 
+    @api_method
     def editChatInviteLink(
         self,
         chat_id: Union[int, str],
@@ -937,9 +1474,8 @@ class TelegramBot:
         :param expire_date (Integer, Optional): Point in time (Unix timestamp) when the link will expire
         :param member_limit (Integer, Optional): Maximum number of users that can be members of the chat simultaneously after joining the chat via this invite link; 1-99999
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("editChatInviteLink", kwargs)
 
+    @api_method
     def revokeChatInviteLink(
         self,
         chat_id: Union[int, str],
@@ -953,9 +1489,8 @@ class TelegramBot:
         :param chat_id (Integer or String): Unique identifier of the target chat or username of the target channel (in the format @channelusername)
         :param invite_link (String): The invite link to revoke
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("revokeChatInviteLink", kwargs)
 
+    @api_method
     def setChatPhoto(
         self,
         chat_id: Union[int, str],
@@ -969,9 +1504,8 @@ class TelegramBot:
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target channel (in the format @channelusername)
         :param photo (InputFile): New chat photo, uploaded using multipart/form-data
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("setChatPhoto", kwargs)
 
+    @api_method
     def deleteChatPhoto(
         self,
         chat_id: Union[int, str],
@@ -983,9 +1517,8 @@ class TelegramBot:
         
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target channel (in the format @channelusername)
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("deleteChatPhoto", kwargs)
 
+    @api_method
     def setChatTitle(
         self,
         chat_id: Union[int, str],
@@ -999,9 +1532,8 @@ class TelegramBot:
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target channel (in the format @channelusername)
         :param title (String): New chat title, 1-255 characters
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("setChatTitle", kwargs)
 
+    @api_method
     def setChatDescription(
         self,
         chat_id: Union[int, str],
@@ -1015,9 +1547,8 @@ class TelegramBot:
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target channel (in the format @channelusername)
         :param description (String, Optional): New chat description, 0-255 characters
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("setChatDescription", kwargs)
 
+    @api_method
     def pinChatMessage(
         self,
         chat_id: Union[int, str],
@@ -1033,9 +1564,8 @@ class TelegramBot:
         :param message_id (Integer): Identifier of a message to pin
         :param disable_notification (Boolean, Optional): Pass True, if it is not necessary to send a notification to all chat members about the new pinned message. Notifications are always disabled in channels and private chats.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("pinChatMessage", kwargs)
 
+    @api_method
     def unpinChatMessage(
         self,
         chat_id: Union[int, str],
@@ -1049,9 +1579,8 @@ class TelegramBot:
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target channel (in the format @channelusername)
         :param message_id (Integer, Optional): Identifier of a message to unpin. If not specified, the most recent pinned message (by sending date) will be unpinned.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("unpinChatMessage", kwargs)
 
+    @api_method
     def unpinAllChatMessages(
         self,
         chat_id: Union[int, str],
@@ -1063,9 +1592,8 @@ class TelegramBot:
         
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target channel (in the format @channelusername)
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("unpinAllChatMessages", kwargs)
 
+    @api_method
     def leaveChat(
         self,
         chat_id: Union[int, str],
@@ -1077,9 +1605,8 @@ class TelegramBot:
         
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target supergroup or channel (in the format @channelusername)
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("leaveChat", kwargs)
 
+    @api_method
     def getChat(
         self,
         chat_id: Union[int, str],
@@ -1091,9 +1618,8 @@ class TelegramBot:
         
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target supergroup or channel (in the format @channelusername)
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("getChat", kwargs)
 
+    @api_method
     def getChatAdministrators(
         self,
         chat_id: Union[int, str],
@@ -1105,9 +1631,8 @@ class TelegramBot:
         
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target supergroup or channel (in the format @channelusername)
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("getChatAdministrators", kwargs)
 
+    @api_method
     def getChatMemberCount(
         self,
         chat_id: Union[int, str],
@@ -1119,9 +1644,8 @@ class TelegramBot:
         
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target supergroup or channel (in the format @channelusername)
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("getChatMemberCount", kwargs)
 
+    @api_method
     def getChatMember(
         self,
         chat_id: Union[int, str],
@@ -1135,9 +1659,8 @@ class TelegramBot:
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target supergroup or channel (in the format @channelusername)
         :param user_id (Integer): Unique identifier of the target user
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("getChatMember", kwargs)
 
+    @api_method
     def setChatStickerSet(
         self,
         chat_id: Union[int, str],
@@ -1151,9 +1674,8 @@ class TelegramBot:
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target supergroup (in the format @supergroupusername)
         :param sticker_set_name (String): Name of the sticker set to be set as the group sticker set
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("setChatStickerSet", kwargs)
 
+    @api_method
     def deleteChatStickerSet(
         self,
         chat_id: Union[int, str],
@@ -1165,9 +1687,8 @@ class TelegramBot:
         
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target supergroup (in the format @supergroupusername)
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("deleteChatStickerSet", kwargs)
 
+    @api_method
     def answerCallbackQuery(
         self,
         callback_query_id: str,
@@ -1188,9 +1709,8 @@ class TelegramBot:
         :param url (String, Optional): URL that will be opened by the user's client. If you have created a Game and accepted the conditions via @Botfather, specify the URL that opens your game \xe2\x80\x94 note that this will only work if the query comes from a callback_game button.Otherwise, you may use links like t.me/your_bot?start=XXXX that open your bot with a parameter.
         :param cache_time (Integer, Optional): The maximum amount of time in seconds that the result of the callback query may be cached client-side. Telegram apps will support caching starting in version 3.14. Defaults to 0.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("answerCallbackQuery", kwargs)
 
+    @api_method
     def setMyCommands(
         self,
         commands: List[BotCommand],
@@ -1206,9 +1726,8 @@ class TelegramBot:
         :param scope (BotCommandScope, Optional): A JSON-serialized object, describing scope of users for which the commands are relevant. Defaults to BotCommandScopeDefault.
         :param language_code (String, Optional): A two-letter ISO 639-1 language code. If empty, commands will be applied to all users from the given scope, for whose language there are no dedicated commands
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("setMyCommands", kwargs)
 
+    @api_method
     def deleteMyCommands(
         self,
         scope: BotCommandScope = None,
@@ -1222,9 +1741,8 @@ class TelegramBot:
         :param scope (BotCommandScope, Optional): A JSON-serialized object, describing scope of users for which the commands are relevant. Defaults to BotCommandScopeDefault.
         :param language_code (String, Optional): A two-letter ISO 639-1 language code. If empty, commands will be applied to all users from the given scope, for whose language there are no dedicated commands
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("deleteMyCommands", kwargs)
 
+    @api_method
     def getMyCommands(
         self,
         scope: BotCommandScope = None,
@@ -1238,9 +1756,8 @@ class TelegramBot:
         :param scope (BotCommandScope, Optional): A JSON-serialized object, describing scope of users. Defaults to BotCommandScopeDefault.
         :param language_code (String, Optional): A two-letter ISO 639-1 language code or an empty string
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("getMyCommands", kwargs)
 
+    @api_method
     def editMessageText(
         self,
         text: str,
@@ -1266,9 +1783,8 @@ class TelegramBot:
         :param disable_web_page_preview (Boolean, Optional): Disables link previews for links in this message
         :param reply_markup (InlineKeyboardMarkup, Optional): A JSON-serialized object for an inline keyboard.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("editMessageText", kwargs)
 
+    @api_method
     def editMessageCaption(
         self,
         chat_id: Union[int, str] = None,
@@ -1292,9 +1808,8 @@ class TelegramBot:
         :param caption_entities (Array of MessageEntity, Optional): List of special entities that appear in the caption, which can be specified instead of parse_mode
         :param reply_markup (InlineKeyboardMarkup, Optional): A JSON-serialized object for an inline keyboard.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("editMessageCaption", kwargs)
 
+    @api_method
     def editMessageMedia(
         self,
         media: InputMedia,
@@ -1314,9 +1829,8 @@ class TelegramBot:
         :param inline_message_id (String, Optional): Required if chat_id and message_id are not specified. Identifier of the inline message
         :param reply_markup (InlineKeyboardMarkup, Optional): A JSON-serialized object for a new inline keyboard.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("editMessageMedia", kwargs)
 
+    @api_method
     def editMessageReplyMarkup(
         self,
         chat_id: Union[int, str] = None,
@@ -1334,9 +1848,8 @@ class TelegramBot:
         :param inline_message_id (String, Optional): Required if chat_id and message_id are not specified. Identifier of the inline message
         :param reply_markup (InlineKeyboardMarkup, Optional): A JSON-serialized object for an inline keyboard.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("editMessageReplyMarkup", kwargs)
 
+    @api_method
     def stopPoll(
         self,
         chat_id: Union[int, str],
@@ -1352,9 +1865,8 @@ class TelegramBot:
         :param message_id (Integer): Identifier of the original message with the poll
         :param reply_markup (InlineKeyboardMarkup, Optional): A JSON-serialized object for a new message inline keyboard.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("stopPoll", kwargs)
 
+    @api_method
     def deleteMessage(
         self,
         chat_id: Union[int, str],
@@ -1368,9 +1880,8 @@ class TelegramBot:
         :param chat_id (Integer or String): Unique identifier for the target chat or username of the target channel (in the format @channelusername)
         :param message_id (Integer): Identifier of the message to delete
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("deleteMessage", kwargs)
 
+    @api_method
     def sendSticker(
         self,
         chat_id: Union[int, str],
@@ -1392,9 +1903,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup or ReplyKeyboardMarkup or ReplyKeyboardRemove or ForceReply, Optional): Additional interface options. A JSON-serialized object for an inline keyboard, custom reply keyboard, instructions to remove reply keyboard or to force a reply from the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendSticker", kwargs)
 
+    @api_method
     def getStickerSet(
         self,
         name: str,
@@ -1406,9 +1916,8 @@ class TelegramBot:
         
         :param name (String): Name of the sticker set
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("getStickerSet", kwargs)
 
+    @api_method
     def uploadStickerFile(
         self,
         user_id: int,
@@ -1422,9 +1931,8 @@ class TelegramBot:
         :param user_id (Integer): User identifier of sticker file owner
         :param png_sticker (InputFile): PNG image with the sticker, must be up to 512 kilobytes in size, dimensions must not exceed 512px, and either width or height must be exactly 512px. More info on Sending Files \xc2\xbb
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("uploadStickerFile", kwargs)
 
+    @api_method
     def createNewStickerSet(
         self,
         user_id: int,
@@ -1450,9 +1958,8 @@ class TelegramBot:
         :param contains_masks (Boolean, Optional): Pass True, if a set of mask stickers should be created
         :param mask_position (MaskPosition, Optional): A JSON-serialized object for position where the mask should be placed on faces
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("createNewStickerSet", kwargs)
 
+    @api_method
     def addStickerToSet(
         self,
         user_id: int,
@@ -1474,9 +1981,8 @@ class TelegramBot:
         :param tgs_sticker (InputFile, Optional): TGS animation with the sticker, uploaded using multipart/form-data. See https://core.telegram.org/animated_stickers#technical-requirements for technical requirements
         :param mask_position (MaskPosition, Optional): A JSON-serialized object for position where the mask should be placed on faces
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("addStickerToSet", kwargs)
 
+    @api_method
     def setStickerPositionInSet(
         self,
         sticker: str,
@@ -1490,9 +1996,8 @@ class TelegramBot:
         :param sticker (String): File identifier of the sticker
         :param position (Integer): New sticker position in the set, zero-based
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("setStickerPositionInSet", kwargs)
 
+    @api_method
     def deleteStickerFromSet(
         self,
         sticker: str,
@@ -1504,9 +2009,8 @@ class TelegramBot:
         
         :param sticker (String): File identifier of the sticker
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("deleteStickerFromSet", kwargs)
 
+    @api_method
     def setStickerSetThumb(
         self,
         name: str,
@@ -1522,9 +2026,8 @@ class TelegramBot:
         :param user_id (Integer): User identifier of the sticker set owner
         :param thumb (InputFile or String, Optional): A PNG image with the thumbnail, must be up to 128 kilobytes in size and have width and height exactly 100px, or a TGS animation with the thumbnail up to 32 kilobytes in size; see https://core.telegram.org/animated_stickers#technical-requirements for animated sticker technical requirements. Pass a file_id as a String to send a file that already exists on the Telegram servers, pass an HTTP URL as a String for Telegram to get a file from the Internet, or upload a new one using multipart/form-data. More info on Sending Files \xc2\xbb. Animated sticker set thumbnail can't be uploaded via HTTP URL.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("setStickerSetThumb", kwargs)
 
+    @api_method
     def answerInlineQuery(
         self,
         inline_query_id: str,
@@ -1548,9 +2051,8 @@ class TelegramBot:
         :param switch_pm_text (String, Optional): If passed, clients will display a button with specified text that switches the user to a private chat with the bot and sends the bot a start message with the parameter switch_pm_parameter
         :param switch_pm_parameter (String, Optional): Deep-linking parameter for the /start message sent to the bot when user presses the switch button. 1-64 characters, only A-Z, a-z, 0-9, _ and - are allowed.Example: An inline bot that sends YouTube videos can ask the user to connect the bot to their YouTube account to adapt search results accordingly. To do this, it displays a 'Connect your YouTube account' button above the results, or even before showing any. The user presses the button, switches to a private chat with the bot and, in doing so, passes a start parameter that instructs the bot to return an oauth link. Once done, the bot can offer a switch_inline button so that the user can easily return to the chat where they wanted to use the bot's inline capabilities.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("answerInlineQuery", kwargs)
 
+    @api_method
     def sendInvoice(
         self,
         chat_id: Union[int, str],
@@ -1612,9 +2114,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup, Optional): A JSON-serialized object for an inline keyboard. If empty, one 'Pay total price' button will be shown. If not empty, the first button must be a Pay button.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendInvoice", kwargs)
 
+    @api_method
     def answerShippingQuery(
         self,
         shipping_query_id: str,
@@ -1632,9 +2133,8 @@ class TelegramBot:
         :param shipping_options (Array of ShippingOption, Optional): Required if ok is True. A JSON-serialized array of available shipping options.
         :param error_message (String, Optional): Required if ok is False. Error message in human readable form that explains why it is impossible to complete the order (e.g. "Sorry, delivery to your desired address is unavailable'). Telegram will display this message to the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("answerShippingQuery", kwargs)
 
+    @api_method
     def answerPreCheckoutQuery(
         self,
         pre_checkout_query_id: str,
@@ -1650,9 +2150,8 @@ class TelegramBot:
         :param ok (Boolean): Specify True if everything is alright (goods are available, etc.) and the bot is ready to proceed with the order. Use False if there are any problems.
         :param error_message (String, Optional): Required if ok is False. Error message in human readable form that explains the reason for failure to proceed with the checkout (e.g. "Sorry, somebody just bought the last of our amazing black T-shirts while you were busy filling out your payment details. Please choose a different color or garment!"). Telegram will display this message to the user.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("answerPreCheckoutQuery", kwargs)
 
+    @api_method
     def setPassportDataErrors(
         self,
         user_id: int,
@@ -1667,9 +2166,8 @@ class TelegramBot:
         :param user_id (Integer): User identifier
         :param errors (Array of PassportElementError): A JSON-serialized array describing the errors
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("setPassportDataErrors", kwargs)
 
+    @api_method
     def sendGame(
         self,
         chat_id: int,
@@ -1691,9 +2189,8 @@ class TelegramBot:
         :param allow_sending_without_reply (Boolean, Optional): Pass True, if the message should be sent even if the specified replied-to message is not found
         :param reply_markup (InlineKeyboardMarkup, Optional): A JSON-serialized object for an inline keyboard. If empty, one 'Play game_title' button will be shown. If not empty, the first button must launch the game.
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("sendGame", kwargs)
 
+    @api_method
     def setGameScore(
         self,
         user_id: int,
@@ -1717,9 +2214,8 @@ class TelegramBot:
         :param message_id (Integer, Optional): Required if inline_message_id is not specified. Identifier of the sent message
         :param inline_message_id (String, Optional): Required if chat_id and message_id are not specified. Identifier of the inline message
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("setGameScore", kwargs)
 
+    @api_method
     def getGameHighScores(
         self,
         user_id: int,
@@ -1738,8 +2234,6 @@ class TelegramBot:
         :param message_id (Integer, Optional): Required if inline_message_id is not specified. Identifier of the sent message
         :param inline_message_id (String, Optional): Required if chat_id and message_id are not specified. Identifier of the inline message
         """
-        kwargs = {k:v for k,v in locals().items() if k!='self' and v!=None}
-        return self("getGameHighScores", kwargs)
 
 
     def _make_instance(self, telegramType: object, req: dict) -> object:
@@ -1747,31 +2241,262 @@ class TelegramBot:
         return from_dict(telegramType, req_data)
 
 
+    def _invalidate_chat_cache(self, update):
+        # membership changes make the cached metadata of the chat stale
+        for member_update in (update.chat_member, update.my_chat_member):
+            if member_update:
+                self.chat_cache.invalidate(member_update.chat.id)
+        message = update.message
+        if message and any(getattr(message, field) for field in CHAT_SERVICE_FIELDS):
+            self.chat_cache.invalidate(message.chat.id)
+
     async def call_handlers(self, update):
-        for handle in ALL_HANDLERS[0].handlers: #onUpdate
-             await handle(update)
-        for handler_function in ALL_HANDLERS[1:]: # Other Handlers
-            if getattr(update, handler_function.attr_name):
-                for handle in handler_function.handlers:
-                    await handle(getattr(update, handler_function.attr_name))
+        if self.chat_cache:
+            self._invalidate_chat_cache(update)
+        # replies to live updates go ahead of the bulk traffic
+        token = current_priority.set(Priority.INTERACTIVE)
+        try:
+            for handle in ALL_HANDLERS[0].handlers: #onUpdate
+                await handle(update)
+            for handler_function in ALL_HANDLERS[1:]: # Other Handlers
+                if getattr(update, handler_function.attr_name):
+                    for handle in handler_function.handlers:
+                        await handle(getattr(update, handler_function.attr_name))
+        finally:
+            current_priority.reset(token)
+
+    async def process_update(
+        self,
+        update: Update,
+        filters: FilterCollection = None,
+        ) -> bool:
+        """
+        Filters, stores and dispatches one update to the handlers, whether it came to the webhook or from `poll`.
+        Returns False if the update was dropped by the filters or is a duplicate.
+
+        Keyword arguments:
+
+        :param update (Update): The received update
+        :param filters (FilterCollection, Optional): Updates not passing the filters are dropped
+        """
+        if filters and not filters.check(update):
+            return False
+        # write on database
+        if self.database:
+            if not self.database.add_update(update):
+                return False # stored by another bot, with `unique_updates`
+            if update.message and update.message.from_:
+                self.database.add_user(update.message.from_)
+        await self.call_handlers(update)
+        return True
 
     def listen(
         self,
         path: str = "/",
         filters: Union[FilterCollection, FilterCondition, Iterable] = None,
+        webhook_reply: bool = False,
+        workers: int = None,
+        max_queue: int = 1000,
+        ordered: bool = False,
+        stats_path: str = None,
+        fast_ingest: bool = False,
         ) -> None:
-        @self.app.post(path)
-        async def recWebHook(update: Update):
-            # filter update
-            f = filters
-            if f:
-                if type(f) != FilterCollection:
-                    f = FilterCollection(f) if isinstance(f, Iterable) else FilterCollection([f])
-                if f and not f.check(update):
+        """
+        Receives the updates sent to the webhook on `path` of `self.app` and passes them to the handlers.
+
+        Keyword arguments:
+
+        :param path (String, Optional): Path of the webhook route. Defaults to "/".
+        :param filters (FilterCollection or FilterCondition, Optional): Updates not passing the filters are dropped
+        :param webhook_reply (Boolean, Optional): Pass True to send the last call made by the handlers of an update
+            (other than getters) in the response to the webhook request, saving one round trip. That call returns None,
+            see WebhookReply.
+        :param workers (Integer, Optional): Acknowledges the updates as soon as they are validated and queues them
+            for this number of worker tasks, see Dispatcher. By default the updates are handled before the response.
+        :param max_queue (Integer, Optional): Number of acknowledged updates waiting for a worker. Defaults to 1000.
+        :param ordered (Boolean, Optional): Pass True to handle the queued updates of each chat one after the other, in order
+        :param stats_path (String, Optional): Path of a route returning the queue depth and the worker utilisation
+        :param fast_ingest (Boolean, Optional): Pass True to decode the body with orjson and check the filters on it
+            through an UpdateView, the Update is validated only if a handler, the database or the chat cache uses it.
+            Filters see an UpdateView instead of an Update.
+        """
+        filters = _filter_collection(filters)
+        if workers:
+            assert not webhook_reply, "The response to a queued update is sent before its handlers run"
+            # the updates are filtered before they are queued
+            self.dispatcher = Dispatcher(self, workers, max_queue, None, ordered)
+            if stats_path:
+                self.app.get(stats_path)(lambda: self.dispatcher.stats)
+
+        async def dispatch(update: Update, filters: FilterCollection):
+            try:
+                return await handle(update, filters)
+            except BaseException:
+                # answered with an error, Telegram sends the update again
+                if self.update_window:
+                    self.update_window.forget(update.update_id)
+                if self.database:
+                    # with `unique_updates` the stored copy would drop the update sent again
+                    self.database.remove_update(update.update_id)
+                raise
+
+        async def handle(update: Update, filters: FilterCollection):
+            if self.dispatcher is not None:
+                if not filters or filters.check(update):
+                    await self.dispatcher.put(update)
+                return
+            reply = WebhookReply() if webhook_reply else None
+            token = current_webhook_reply.set(reply)
+            try:
+                await self.process_update(update, filters)
+            finally:
+                current_webhook_reply.reset(token)
+            if reply:
+                payload = reply.close()
+                if payload:
+                    return JSONResponse(jsonable_encoder(payload, exclude_none= True))
+
+        if fast_ingest:
+            @self.app.post(path)
+            async def recWebHook(request: Request):
+                try:
+                    data = json_loads(await request.body())
+                    update_id = data['update_id']
+                except (ValueError, TypeError, KeyError):
+                    return JSONResponse({'detail': "Invalid update"}, status_code= 422)
+                if type(update_id) is not int: # bool or a string would corrupt the update window
+                    return JSONResponse({'detail': "Invalid update"}, status_code= 422)
+                # Telegram sends an update again when the response to the webhook comes late
+                if self.update_window and self.update_window.seen(update_id):
+                    return
+                try:
+                    passed = not filters or filters.check(UpdateView(data))
+                except (AttributeError, TypeError, KeyError):
+                    passed = None # e.g. a field the filter expects is missing, checked on the Update
+                if not passed and passed is not None:
+                    return
+                if passed and not self._needs_model(data):
                     return
-            # write on database
-            if self.database:
-                self.database.add_update(update)
-                if update.message and update.message.from_:
-                    self.database.add_user(update.message.from_)
-            await self.call_handlers(update)
\ No newline at end of file
+                try:
+                    update = Update.parse_obj(data)
+                except ValidationError as e:
+                    if self.update_window:
+                        self.update_window.forget(update_id)
+                    return JSONResponse({'detail': e.errors()}, status_code= 422)
+                return await dispatch(update, None if passed else filters)
+        else:
+            @self.app.post(path)
+            async def recWebHook(update: Update):
+                # Telegram sends an update again when the response to the webhook comes late
+                if self.update_window and self.update_window.seen(update.update_id):
+                    return
+                return await dispatch(update, filters)
+
+    def _needs_model(self, data: dict) -> bool:
+        """Whether anything uses the update: the database, a handler or the chat cache."""
+        if self.database or ALL_HANDLERS[0].handlers: # onUpdate
+            return True
+        for handler in ALL_HANDLERS[1:]:
+            if handler.handlers and data.get(handler.attr_name):
+                return True
+        if self.chat_cache:
+            if data.get('chat_member') or data.get('my_chat_member'):
+                return True
+            message = data.get('message')
+            if message and any(message.get(field) for field in CHAT_SERVICE_FIELDS):
+                return True
+        return False
+
+    async def poll(
+        self,
+        timeout: int = 30,
+        limit: int = 100,
+        allowed_updates: List[str] = None,
+        filters: Union[FilterCollection, FilterCondition, Iterable] = None,
+        concurrency: int = 100,
+        drop_pending_updates: bool = None,
+        ):
+        """
+        Receives the updates with getUpdates long polling instead of a webhook, and passes them to the
+        handlers like `listen`, e.g. `asyncio.run(bot.poll())`. Runs until it is cancelled.
+        The next getUpdates call is sent while the updates of the current one are handled. At most
+        `concurrency` updates are handled at once, the updates beyond wait for a slot and no more than
+        one batch is fetched ahead of them.
+
+        Keyword arguments:
+
+        :param timeout (Integer, Optional): Timeout in seconds of the long polling. Defaults to 30.
+        :param limit (Integer, Optional): Updates received per call, 1-100. Defaults to 100.
+        :param allowed_updates (Array of String, Optional): The update types to receive, see getUpdates
+        :param filters (FilterCollection or FilterCondition, Optional): Updates not passing the filters are dropped
+        :param concurrency (Integer, Optional): Number of updates handled at once. Defaults to 100.
+        :param drop_pending_updates (Boolean, Optional): Pass True to drop the updates received before the start
+        """
+        filters = _filter_collection(filters)
+        started = not self.ready
+        if started:
+            await self.startup()
+        # getUpdates doesn't work while a webhook is set
+        await self.deleteWebhook(drop_pending_updates= drop_pending_updates)
+
+        slots = asyncio.Semaphore(concurrency)
+        handling = set()
+        offset = None
+
+        async def fetch(offset):
+            failures = 0
+            while True:
+                try:
+                    return await self.getUpdates(offset, limit, timeout, allowed_updates)
+                except (httpx.TransportError, CircuitOpenError):
+                    delay = None # the API is unreachable, waits for it
+                except TelegramError as e:
+                    # the retries of the RetryPolicy ran out, the poller keeps going
+                    if e.error_code != 429 and e.error_code < 500:
+                        raise
+                    delay = e.parameters.retry_after if e.parameters and e.parameters.retry_after else None
+                failures += 1
+                await asyncio.sleep(delay or min(2 ** failures, 60))
+
+        async def handle(update):
+            try:
+                await self.process_update(update, filters)
+            except Exception as e:
+                # the update was confirmed with the next getUpdates, its errors can only be reported
+                asyncio.get_event_loop().call_exception_handler({
+                    'message': f"Exception while handling update {update.update_id}",
+                    'exception': e,
+                })
+            finally:
+                slots.release()
+
+        fetching = asyncio.ensure_future(fetch(offset))
+        try:
+            while True:
+                updates = [
+                    Update.parse_obj(update) if isinstance(update, dict) else update # raw_results
+                    for update in await fetching
+                ]
+                if updates:
+                    # receiving the next batch confirms the current one
+                    offset = updates[-1].update_id + 1
+                fetching = asyncio.ensure_future(fetch(offset))
+                for update in updates:
+                    await slots.acquire()
+                    task = asyncio.ensure_future(handle(update))
+                    handling.add(task)
+                    task.add_done_callback(handling.discard)
+        finally:
+            fetching.cancel()
+            if started:
+                if handling:
+                    await asyncio.wait(handling)
+                await self.shutdown()
+
+
+def _filter_collection(
+    filters: Union[FilterCollection, FilterCondition, Iterable],
+    ) -> FilterCollection:
+    if filters and type(filters) != FilterCollection:
+        filters = FilterCollection(filters) if isinstance(filters, Iterable) else FilterCollection([filters])
+    return filters
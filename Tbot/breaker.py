@@ -0,0 +1,142 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .exceptions import TelegramError
+
+
+# read methods safe to send twice, a second attempt is sent when the first one is slow
+HEDGED_METHODS = {
+    "getMe",
+    "getChat",
+    "getChatMember",
+    "getChatAdministrators",
+    "getChatMemberCount",
+    "getFile",
+    "getUserProfilePhotos",
+    "getStickerSet",
+    "getMyCommands",
+    "getWebhookInfo",
+}
+
+# seconds a call may take, the uploads get more time
+DEFAULT_TIMEOUTS = {
+    "answerCallbackQuery": 5,
+    "answerInlineQuery": 5,
+    "sendPhoto": 60,
+    "sendAudio": 60,
+    "sendDocument": 60,
+    "sendVideo": 60,
+    "sendAnimation": 60,
+    "sendVoice": 60,
+    "sendVideoNote": 60,
+    "sendMediaGroup": 120,
+    "uploadStickerFile": 60,
+    "setChatPhoto": 60,
+}
+
+
+class CircuitOpenError(TelegramError):
+    """Raised for urgent calls while the Bot API is considered unhealthy, instead of waiting for it."""
+    def __init__(self, method: str):
+        super().__init__(method, 503, "The Bot API circuit is open")
+
+
+class CircuitBreaker:
+    """
+    Stops sending calls after `failure_threshold` consecutive failures (timeouts, broken connections
+    and 5xx answers). While open, urgent calls fail fast with CircuitOpenError and the other ones are
+    held until the circuit closes. After `reset_timeout` seconds one call is let through as a probe,
+    its success closes the circuit and its failure opens it again.
+
+    Keyword arguments:
+
+    :param failure_threshold (Integer, Optional): Consecutive failures opening the circuit. Defaults to 5.
+    :param reset_timeout (Float, Optional): Seconds the circuit stays open before a probe. Defaults to 30.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._changed: asyncio.Event = None
+
+    def _notify(self):
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    async def acquire(self, method: str, urgent: bool = False):
+        """Waits until a call may be sent, urgent calls raise CircuitOpenError instead of waiting."""
+        while self.state != self.CLOSED:
+            elapsed = time.monotonic() - self.opened_at
+            # the probe also gets through when the previous one never reported
+            if elapsed >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.opened_at = time.monotonic()
+                return
+            if urgent:
+                raise CircuitOpenError(method)
+            if self._changed is None:
+                self._changed = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._changed.wait(), self.reset_timeout - elapsed)
+            except asyncio.TimeoutError:
+                pass
+
+    def record_success(self):
+        self.failures = 0
+        if self.state != self.CLOSED:
+            self.state = self.CLOSED
+            self._notify()
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """
+    Keeps the last `size` latencies of each method to estimate their 95th percentile.
+
+    Keyword arguments:
+
+    :param size (Integer, Optional): Number of latencies kept per method. Defaults to 100.
+    :param min_samples (Integer, Optional): Number of latencies needed for an estimate. Defaults to 20.
+    """
+    def __init__(
+        self,
+        size: int = 100,
+        min_samples: int = 20,
+        ):
+        self.size = size
+        self.min_samples = min_samples
+        self.samples: Dict[str, deque] = {}
+        self._p95: Dict[str, float] = {}
+
+    def record(self, method: str, seconds: float):
+        samples = self.samples.get(method)
+        if samples is None:
+            samples = self.samples[method] = deque(maxlen= self.size)
+        samples.append(seconds)
+        self._p95.pop(method, None)
+
+    def p95(self, method: str) -> Optional[float]:
+        """The 95th percentile latency of the method, None until enough calls were made."""
+        if method not in self._p95:
+            samples = self.samples.get(method)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+            self._p95[method] = ordered[int(len(ordered) * 0.95) - 1]
+        return self._p95[method]
@@ -0,0 +1,204 @@
+import asyncio
+import time
+from collections import deque
+from itertools import islice
+from typing import Callable, Optional
+
+from .exceptions import TelegramError
+from .ratelimit import Priority, priority
+from .webhook import current_webhook_reply
+
+
+class BroadcastProgress:
+    """
+    Progress of a broadcast run, passed to the `on_progress` callback and returned when the run ends.
+    """
+    def __init__(
+        self,
+        name: str,
+        total: int,
+        sent: int = 0,
+        failed: int = 0,
+        blocked: int = 0,
+        ):
+        self.name = name
+        self.total = total
+        self.sent = sent
+        self.failed = failed
+        self.blocked = blocked
+        self.started = time.monotonic()
+        self.done_at_start = self.done
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed + self.blocked
+
+    @property
+    def rate(self) -> float:
+        """Recipients handled per second in this run."""
+        elapsed = time.monotonic() - self.started
+        return (self.done - self.done_at_start) / elapsed if elapsed else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds left until every recipient is handled."""
+        rate = self.rate
+        return max(self.total - self.done, 0) / rate if rate else None
+
+    def __repr__(self):
+        eta = f"{self.eta:.0f}s" if self.eta is not None else "?"
+        return (
+            f"<Broadcast {self.name}: {self.done}/{self.total} sent={self.sent} failed={self.failed}"
+            f" blocked={self.blocked} rate={self.rate:.1f}/s eta={eta}>"
+        )
+
+
+class Broadcast:
+    """
+    Sends one method call to every user of `Database.users` matching `query`.
+
+    Recipients are streamed in the order of their ids and handled by `concurrency` workers, under the
+    rate limits of the bot. The id up to which every user has been handled is checkpointed in
+    `Database.broadcasts` under `name`, so running a broadcast with the same name again resumes it.
+    Users that blocked the bot or were deactivated are marked as `blocked` and skipped from then on.
+    The calls are sent in the BULK lane, behind the replies to live updates.
+    """
+    # descriptions of the 403 answers for users that can't be reached anymore
+    UNREACHABLE = ("blocked", "deactivated", "kicked", "can't initiate conversation")
+
+    def __init__(
+        self,
+        bot,
+        name: str,
+        method: str = "sendMessage",
+        query: dict = None,
+        concurrency: int = 20,
+        checkpoint_every: int = 100,
+        on_progress: Callable[[BroadcastProgress], None] = None,
+        **params,
+        ):
+        assert bot.database, "A database must be set to broadcast"
+        self.bot = bot
+        self.database = bot.database
+        self.name = name
+        self.method = method
+        self.query = query or {}
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+        self.on_progress = on_progress
+        self.params = params
+
+        # ids in the order they were handed to the workers, and the outcome of the handled ones
+        self._issued = deque()
+        self._handled = {}
+        self._last_id = None
+        self._error: BaseException = None
+
+    def _recipients_query(self) -> dict:
+        query = {**self.query, 'blocked': {'$ne': True}}
+        if self._last_id is not None:
+            query['_id'] = {'$gt': self._last_id}
+        return query
+
+    def _advance(self, progress: BroadcastProgress):
+        # only ids with every smaller id handled are counted, they are the ones a resumed run skips
+        while self._issued and self._issued[0] in self._handled:
+            self._last_id = self._issued.popleft()
+            outcome = self._handled.pop(self._last_id)
+            setattr(progress, outcome, getattr(progress, outcome) + 1)
+
+    def _checkpoint(self, progress: BroadcastProgress, ended: bool = False):
+        self._advance(progress)
+        finished = ended and not self._issued
+        self.database.broadcasts.update_one(
+            {'_id': self.name},
+            {'$set': {
+                'method': self.method,
+                'last_id': self._last_id,
+                'sent': progress.sent,
+                'failed': progress.failed,
+                'blocked': progress.blocked,
+                'total': progress.total,
+                'finished': finished,
+            }},
+            upsert= True,
+        )
+        if self.on_progress:
+            self.on_progress(progress)
+
+    async def _send(self, user_id, progress: BroadcastProgress):
+        try:
+            await getattr(self.bot, self.method)(chat_id= user_id, **self.params)
+        except TelegramError as e:
+            if e.error_code == 403 and any(s in (e.description or '') for s in self.UNREACHABLE):
+                self.database.block_user(user_id)
+                self._handled[user_id] = 'blocked'
+            else:
+                self._handled[user_id] = 'failed'
+        else:
+            self._handled[user_id] = 'sent'
+        done = progress.done
+        self._advance(progress)
+        if progress.done // self.checkpoint_every > done // self.checkpoint_every:
+            self._checkpoint(progress)
+
+    async def _worker(self, queue: asyncio.Queue, progress: BroadcastProgress):
+        # a broadcast started by a handler outlives its update, no call goes in the webhook response
+        current_webhook_reply.set(None)
+        while True:
+            user_id = await queue.get()
+            try:
+                if user_id is None:
+                    return
+                if not self._error:
+                    await self._send(user_id, progress)
+            except Exception as e:
+                # e.g. the API is unreachable, the run stops and can be resumed later
+                self._error = e
+            finally:
+                queue.task_done()
+
+    async def run(self) -> BroadcastProgress:
+        state = self.database.broadcasts.find_one({'_id': self.name}) or {}
+        self._last_id = state.get('last_id')
+        progress = BroadcastProgress(
+            self.name,
+            total= 0,
+            sent= state.get('sent', 0),
+            failed= state.get('failed', 0),
+            blocked= state.get('blocked', 0),
+        )
+        if state.get('finished'):
+            progress.total = progress.done
+            return progress
+
+        progress.total = progress.done + self.database.users.count_documents(self._recipients_query())
+        cursor = self.database.users.find(self._recipients_query(), {'_id': 1}).sort('_id', 1)
+
+        queue = asyncio.Queue(maxsize= self.concurrency * 2)
+        with priority(Priority.BULK): # the workers inherit the lane
+            workers = [
+                asyncio.ensure_future(self._worker(queue, progress))
+                for _ in range(self.concurrency)
+            ]
+        try:
+            while True:
+                batch = list(islice(cursor, self.concurrency))
+                if not batch:
+                    break
+                for user in batch:
+                    if self._error:
+                        raise self._error
+                    self._issued.append(user['_id'])
+                    await queue.put(user['_id'])
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+            if self._error:
+                raise self._error
+        finally:
+            for worker in workers:
+                worker.cancel()
+            cursor.close()
+            self._checkpoint(progress, ended= True)
+        return progress
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Union, Callable, Awaitable, Set
+
+
+# seconds the results of the chat metadata lookups are reused for
+DEFAULT_TTLS = {
+    "getChat": 60,
+    "getChatAdministrators": 60,
+    "getChatMemberCount": 60,
+    "getChatMember": 30,
+}
+
+# methods changing the metadata of the chat they are called for
+CHAT_MUTATIONS = {
+    "banChatMember",
+    "unbanChatMember",
+    "restrictChatMember",
+    "promoteChatMember",
+    "setChatAdministratorCustomTitle",
+    "setChatPermissions",
+    "setChatPhoto",
+    "deleteChatPhoto",
+    "setChatTitle",
+    "setChatDescription",
+    "pinChatMessage",
+    "unpinChatMessage",
+    "unpinAllChatMessages",
+    "setChatStickerSet",
+    "deleteChatStickerSet",
+    "leaveChat",
+}
+
+# fields of the service messages changing the metadata of their chat
+CHAT_SERVICE_FIELDS = (
+    "new_chat_members",
+    "left_chat_member",
+    "new_chat_title",
+    "new_chat_photo",
+    "delete_chat_photo",
+    "pinned_message",
+    "migrate_to_chat_id",
+)
+
+
+class ChatCache:
+    """
+    Read-through cache of the chat metadata lookups (getChat, getChatMember, ...) with one TTL per method.
+    Concurrent lookups of the same key share a single in-flight call. All the entries of a chat are
+    dropped by `invalidate`, lookups in flight at that moment are not stored.
+
+    Keyword arguments:
+
+    :param ttls (Dict, Optional): Seconds to reuse the result of each method for, merged with DEFAULT_TTLS
+    :param max_size (Integer, Optional): Number of entries kept, the least recently used are dropped first
+    """
+    def __init__(
+        self,
+        ttls: Dict[str, float] = None,
+        max_size: int = 10000,
+        ):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict() # key -> (result, expiry)
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._by_chat: Dict[str, Set[tuple]] = {}
+
+    @staticmethod
+    def _key(method: str, params: dict) -> tuple:
+        params = params or {}
+        return (method, str(params.get('chat_id')), params.get('user_id'))
+
+    async def get(
+        self,
+        method: str,
+        params: dict,
+        fetch: Callable[[], Awaitable],
+        ):
+        """Returns the cached result of the call, or awaits `fetch` to get it."""
+        key = self._key(method, params)
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self.entries.move_to_end(key)
+                return entry[0]
+            self._drop(key)
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fetch())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._done(key, f))
+        return await asyncio.shield(future)
+
+    def _done(self, key: tuple, future: asyncio.Future):
+        if self._inflight.get(key) is not future:
+            return # invalidated while in flight
+        del self._inflight[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.entries[key] = (future.result(), time.monotonic() + self.ttls[key[0]])
+        self._by_chat.setdefault(key[1], set()).add(key)
+        while len(self.entries) > self.max_size:
+            self._drop(next(iter(self.entries)))
+
+    def _drop(self, key: tuple):
+        self.entries.pop(key, None)
+        keys = self._by_chat.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_chat[key[1]]
+
+    def invalidate(self, chat_id: Union[int, str]):
+        """Drops everything cached about the chat."""
+        chat_id = str(chat_id)
+        for key in self._by_chat.pop(chat_id, ()):
+            self.entries.pop(key, None)
+        for key in [key for key in self._inflight if key[1] == chat_id]:
+            del self._inflight[key]
@@ -1,5 +1,8 @@
 
+from typing import Union
+
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
 import httpx
 
 from .types import Update, Message, User
@@ -8,7 +11,8 @@ class Database:
     def __init__(
         self,
         connecting_string: str = None,
-        database_name = 'bot_db'
+        database_name = 'bot_db',
+        unique_updates: bool = False,
         ):
         self.cluster = MongoClient(connecting_string)
         self.db = self.cluster[database_name]
@@ -16,19 +20,45 @@ class Database:
         self.updates = self.db['updates']
         self.users = self.db['users']
         self.sent = self.db['sent']
+        self.broadcasts = self.db['broadcasts']
+        self.files = self.db['files']
+        self.jobs = self.db['jobs']
+        if unique_updates:
+            # an update stored twice, e.g. by two bots behind the same webhook, is handled once
+            self.updates.create_index('update_id', unique= True)
+
+
+    def ping(self):
+        """Round trip to the server, which also opens the connections of the client."""
+        self.cluster.admin.command('ping')
 
 
     def add_update(self,
         update: Update,
+        ) -> bool:
+        """Stores the update, returns False if it was stored before (with `unique_updates`)."""
+        try:
+            self.updates.insert_one(update.dict())
+        except DuplicateKeyError:
+            return False
+        return True
+
+
+    def remove_update(
+        self,
+        update_id: int,
         ):
-        self.updates.insert_one(update.dict())
+        """Removes a stored update, e.g. when its handling failed and Telegram will send it again."""
+        self.updates.delete_one({'update_id': update_id})
 
 
     def add_sent(
         self,
-        response: httpx.Response,
+        response: Union[httpx.Response, dict],
         ):
-        self.sent.insert_one(response.json())
+        if isinstance(response, httpx.Response):
+            response = response.json()
+        self.sent.insert_one(response)
 
 
     def add_user(
@@ -46,4 +76,14 @@ class Database:
                     '_id': user.id,
                     **user.dict(),
                 }
-            )
\ No newline at end of file
+            )
+
+
+    def block_user(
+        self,
+        user_id: int,
+        ):
+        self.users.update_one(
+            {'_id': user_id},
+            {'$set': {'blocked': True}},
+        )
\ No newline at end of file
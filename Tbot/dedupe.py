@@ -0,0 +1,52 @@
+class UpdateWindow:
+    """
+    Remembers which of the last `size` update_ids were seen, to drop the updates Telegram delivers
+    again when the answer to the webhook came late. The ids are bits of a ring relative to the
+    highest id seen, so the memory used is `size` bits whatever the number of updates.
+
+    Telegram may restart the numbering of the updates from a random id (e.g. after a week without
+    updates), so an id below the window is taken as a new start rather than as a duplicate.
+
+    Keyword arguments:
+
+    :param size (Integer, Optional): Number of update_ids remembered, a multiple of 8. Defaults to 65536.
+    """
+    def __init__(
+        self,
+        size: int = 65536,
+        ):
+        assert size % 8 == 0, "size must be a multiple of 8"
+        self.size = size
+        self.bits = bytearray(size // 8)
+        self.highest: int = None
+
+    def _clear(self, start: int, end: int):
+        """Clears the bits of the ids from `start` to `end` excluded."""
+        if end - start >= self.size:
+            self.bits[:] = bytes(len(self.bits))
+            return
+        for update_id in range(start, end):
+            position = update_id % self.size
+            self.bits[position >> 3] &= ~(1 << (position & 7)) & 0xFF
+
+    def seen(self, update_id: int) -> bool:
+        """Returns True if the update_id was seen before, and marks it as seen."""
+        if self.highest is None or update_id <= self.highest - self.size:
+            self.bits[:] = bytes(len(self.bits))
+            self.highest = update_id
+        elif update_id > self.highest:
+            self._clear(self.highest + 1, update_id + 1)
+            self.highest = update_id
+
+        position = update_id % self.size
+        mask = 1 << (position & 7)
+        if self.bits[position >> 3] & mask:
+            return True
+        self.bits[position >> 3] |= mask
+        return False
+
+    def forget(self, update_id: int):
+        """Marks the update_id as not seen, e.g. when its handling failed and Telegram will send it again."""
+        if self.highest is not None and self.highest - self.size < update_id <= self.highest:
+            position = update_id % self.size
+            self.bits[position >> 3] &= ~(1 << (position & 7)) & 0xFF
@@ -0,0 +1,167 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Hashable, Optional
+
+from .types import Update
+from .filters import FilterCollection
+
+
+def update_key(update: Update) -> Optional[Hashable]:
+    """
+    The chat an update belongs to, or its user for the updates without a chat (inline queries, ...).
+    In private chats both are the same id. Polls have none.
+    """
+    message = (
+        update.message or update.edited_message or update.channel_post or update.edited_channel_post
+        or (update.callback_query and update.callback_query.message)
+    )
+    if message:
+        return message.chat.id
+    member_update = update.my_chat_member or update.chat_member
+    if member_update:
+        return member_update.chat.id
+    query = (
+        update.callback_query or update.inline_query or update.chosen_inline_result
+        or update.shipping_query or update.pre_checkout_query
+    )
+    if query:
+        return query.from_.id
+    if update.poll_answer:
+        return update.poll_answer.user.id
+    return None
+
+
+class Dispatcher:
+    """
+    Handles the updates in the background: `put` queues an update and returns, and `workers` tasks
+    take the updates and pass them to `bot.process_update`. Once `max_queue` updates are waiting,
+    `put` waits too, which holds the webhook requests back instead of piling up updates in memory.
+
+    With `ordered`, the updates of a chat (see `update_key`) are handled one after the other in the
+    order they came, while different chats are handled in parallel. Each chat with waiting updates
+    has its own queue, dropped as soon as it's empty, and the chats take turns on the workers.
+
+    Keyword arguments:
+
+    :param bot (TelegramBot): The bot whose handlers are called
+    :param workers (Integer, Optional): Number of updates handled at once. Defaults to 100.
+    :param max_queue (Integer, Optional): Number of updates waiting for a worker. Defaults to 1000.
+    :param filters (FilterCollection, Optional): Updates not passing the filters are dropped
+    :param ordered (Boolean, Optional): Pass True to handle the updates of each chat in order
+    """
+    def __init__(
+        self,
+        bot,
+        workers: int = 100,
+        max_queue: int = 1000,
+        filters: FilterCollection = None,
+        ordered: bool = False,
+        ):
+        self.bot = bot
+        self.workers = workers
+        self.max_queue = max_queue
+        self.filters = filters
+        self.ordered = ordered
+        self.tasks = []
+
+        # key -> updates waiting, a key is in `_ready` once, while it has updates and no worker
+        self._pending: Dict[Hashable, deque] = {}
+        self._ready: asyncio.Queue = None
+        self._room: asyncio.Semaphore = None
+
+        self.queued = 0
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._busy_time = 0.0 # of the handled updates
+        self._busy_since = {} # worker -> start of its current update
+
+    def start(self):
+        if self.tasks:
+            return
+        self._ready = asyncio.Queue()
+        self._room = asyncio.Semaphore(self.max_queue)
+        self.started = time.monotonic()
+        self.tasks = [asyncio.ensure_future(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        """Waits for the queued updates to be handled, then stops the workers."""
+        if not self.tasks:
+            return
+        await self._ready.join()
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+
+    async def put(self, update: Update):
+        """Queues the update, waits only while the queue is full."""
+        self.start()
+        await self._room.acquire()
+        key = update_key(update) if self.ordered else None
+        if key is None:
+            key = object() # handled on its own
+        self.queued += 1
+        updates = self._pending.get(key)
+        if updates is None:
+            self._pending[key] = deque([update])
+            self._ready.put_nowait(key)
+        else:
+            updates.append(update)
+
+    async def _worker(self, number: int):
+        while True:
+            key = await self._ready.get()
+            updates = self._pending[key]
+            update = updates.popleft()
+            self.queued -= 1
+            self._room.release()
+            self.busy += 1
+            self._busy_since[number] = time.monotonic()
+            try:
+                await self.bot.process_update(update, self.filters)
+                self.processed += 1
+            except Exception as e:
+                # the update was acknowledged, its errors can only be reported
+                self.failed += 1
+                asyncio.get_event_loop().call_exception_handler({
+                    'message': f"Exception while handling update {update.update_id}",
+                    'exception': e,
+                })
+            finally:
+                self._busy_time += time.monotonic() - self._busy_since.pop(number)
+                self.busy -= 1
+                # the next update of the chat waits for its turn behind the other chats
+                if updates:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._pending[key]
+                self._ready.task_done()
+
+    @property
+    def busy_time(self) -> float:
+        """Seconds spent handling updates by all the workers since the start."""
+        now = time.monotonic()
+        return self._busy_time + sum(now - since for since in self._busy_since.values())
+
+    @property
+    def stats(self) -> dict:
+        """
+        Queue depth and worker utilisation. `utilisation` is the average share of busy workers since
+        the start, a monitor sampling `busy_time` and `uptime` gets it over its own interval.
+        """
+        uptime = time.monotonic() - self.started
+        busy_time = self.busy_time
+        return {
+            'queue_depth': self.queued,
+            'max_queue': self.max_queue,
+            'keys': len(self._pending),
+            'workers': self.workers,
+            'busy_workers': self.busy,
+            'processed': self.processed,
+            'failed': self.failed,
+            'busy_time': busy_time,
+            'uptime': uptime,
+            'utilisation': busy_time / (uptime * self.workers) if uptime and self.workers else 0.0,
+        }
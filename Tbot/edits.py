@@ -0,0 +1,148 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Awaitable, List
+
+from .exceptions import TelegramError
+from .utils import json_dumps
+
+
+# methods whose calls are coalesced per edited message
+COALESCED_EDITS = {
+    "editMessageText",
+    "editMessageCaption",
+    "editMessageReplyMarkup",
+}
+
+# parts of the message set by each edit, and the parameters defining them. An edit without
+# reply_markup removes the keyboard, so the text and caption edits set the markup too.
+EDITED_FIELDS = {
+    "editMessageText": {
+        'text': ('text', 'parse_mode', 'entities', 'disable_web_page_preview'),
+        'reply_markup': ('reply_markup',),
+    },
+    "editMessageCaption": {
+        'caption': ('caption', 'parse_mode', 'caption_entities'),
+        'reply_markup': ('reply_markup',),
+    },
+    "editMessageReplyMarkup": {
+        'reply_markup': ('reply_markup',),
+    },
+}
+
+
+def _fields(method: str, params: dict) -> dict:
+    return {
+        field: json_dumps([params.get(name) for name in names])
+        for field, names in EDITED_FIELDS[method].items()
+    }
+
+
+class _EditState:
+    __slots__ = ('delivered', 'sent_at', 'pending', 'task')
+
+    def __init__(self):
+        self.delivered = {} # field -> content set by the last successful edit
+        self.sent_at = 0.0
+        # method -> [params, fields, send, waiters] of the latest edit not sent yet
+        self.pending: OrderedDict = OrderedDict()
+        self.task: asyncio.Task = None
+
+    def unchanged(self, fields: dict) -> bool:
+        return all(self.delivered.get(field) == content for field, content in fields.items())
+
+
+class EditCoalescer:
+    """
+    Coalesces the edits of a message: at most one edit per `window` seconds is sent for each
+    message (chat_id and message_id, or inline_message_id), carrying the latest content of its method,
+    and the callers of the edits it replaced get its result. The text, caption and markup delivered
+    are remembered apart, an edit whose fields all match them returns True without a call, and so do
+    the "message is not modified" answers.
+
+    Keyword arguments:
+
+    :param window (Float, Optional): Seconds between two edits of the same message. Defaults to 1.
+    :param max_size (Integer, Optional): Number of messages whose last content is remembered
+    """
+    def __init__(
+        self,
+        window: float = 1,
+        max_size: int = 10000,
+        ):
+        self.window = window
+        self.max_size = max_size
+        self.states: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def _key(params: dict) -> tuple:
+        if params.get('inline_message_id'):
+            return (params['inline_message_id'],)
+        return (str(params.get('chat_id')), params.get('message_id'))
+
+    async def edit(
+        self,
+        method: str,
+        params: dict,
+        send: Callable[[dict], Awaitable],
+        ):
+        key = self._key(params)
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = _EditState()
+            self._trim()
+        self.states.move_to_end(key)
+
+        fields = _fields(method, params)
+        if state.task is None and state.unchanged(fields):
+            return True
+
+        future = asyncio.get_event_loop().create_future()
+        pending = state.pending.get(method)
+        if pending is None:
+            state.pending[method] = [params, fields, send, [future]]
+        else:
+            # the latest content of the method replaces the one waiting, in the same turn
+            pending[:3] = params, fields, send
+            pending[3].append(future)
+        if state.task is None:
+            state.task = asyncio.ensure_future(self._flush(state))
+        return await asyncio.shield(future)
+
+    def _trim(self):
+        while len(self.states) > self.max_size:
+            key, state = next(iter(self.states.items()))
+            if state.task is not None:
+                break # the oldest message is still being edited
+            del self.states[key]
+
+    async def _flush(self, state: _EditState):
+        try:
+            while state.pending:
+                delay = state.sent_at + self.window - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                _, (params, fields, send, waiters) = state.pending.popitem(last= False)
+
+                if state.unchanged(fields):
+                    result = True
+                else:
+                    try:
+                        result = await send(params)
+                    except TelegramError as e:
+                        if 'message is not modified' not in (e.description or ''):
+                            for waiter in waiters:
+                                waiter.set_exception(e)
+                            continue
+                        result = True
+                    except Exception as e:
+                        for waiter in waiters:
+                            waiter.set_exception(e)
+                        continue
+                    finally:
+                        state.sent_at = time.monotonic()
+                    state.delivered.update(fields)
+                for waiter in waiters:
+                    waiter.set_result(result)
+        finally:
+            state.task = None
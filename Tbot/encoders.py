@@ -0,0 +1,35 @@
+import functools
+import inspect
+from typing import Callable
+
+
+def compile_encoder(func: Callable) -> Callable:
+    """
+    Generates the body of a Bot API method wrapper from its signature: the arguments are put in the
+    parameters dict directly, the optional ones only when they are not None. Nested TelegramType
+    values are kept as they are and serialized once with the whole body by `json_dumps`.
+    """
+    method = func.__name__
+    parameters = list(inspect.signature(func).parameters.values())[1:] # self
+    required = [p.name for p in parameters if p.default is inspect.Parameter.empty]
+    optional = [p.name for p in parameters if p.default is not inspect.Parameter.empty]
+
+    arguments = ", ".join(["self"] + required + [f"{name}=None" for name in optional])
+    lines = [f"def {method}({arguments}):"]
+    if parameters:
+        lines.append("    params = {" + ", ".join(f"{name!r}: {name}" for name in required) + "}")
+        for name in optional:
+            lines.append(f"    if {name} is not None:")
+            lines.append(f"        params[{name!r}] = {name}")
+        lines.append(f"    return self({method!r}, params)")
+    else:
+        lines.append(f"    return self({method!r}, None)")
+
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace[method]
+
+
+def api_method(func: Callable) -> Callable:
+    """Decorator replacing the body of a Bot API method wrapper with its compiled encoder."""
+    return functools.wraps(func)(compile_encoder(func))
@@ -0,0 +1,26 @@
+from .types import ResponseParameters
+
+
+class TelegramError(Exception):
+    """
+    Raised when the Bot API answers a call with `"ok": false`.
+
+    Keyword arguments:
+
+    :param method (String): The called Bot API method
+    :param error_code (Integer): The error code of the answer, usually the HTTP status code
+    :param description (String): Human-readable description of the error
+    :param parameters (ResponseParameters): Optional. Why the request was unsuccessful
+    """
+    def __init__(
+        self,
+        method: str,
+        error_code: int,
+        description: str,
+        parameters: ResponseParameters = None,
+        ):
+        super().__init__(f"{method} failed with {error_code}: {description}")
+        self.method = method
+        self.error_code = error_code
+        self.description = description
+        self.parameters = parameters
@@ -0,0 +1,518 @@
+import asyncio
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, AsyncIterator, List, Tuple, Union, BinaryIO
+from uuid import uuid4
+
+from pymongo.collection import Collection
+
+from .types import TelegramType, InputFile, InputMedia
+from .utils import json_dumps
+
+
+# parameter holding the uploaded file of the methods whose uploads are cached, the file
+# is found in the field with the same name of the sent Message
+CACHED_UPLOADS = {
+    "sendPhoto": "photo",
+    "sendAudio": "audio",
+    "sendDocument": "document",
+    "sendVideo": "video",
+    "sendAnimation": "animation",
+    "sendVoice": "voice",
+    "sendVideoNote": "video_note",
+    "sendSticker": "sticker",
+}
+
+
+class MultipartUpload:
+    """
+    A multipart/form-data body streamed from the InputFile parameters of a call.
+    Files are read in chunks of `chunk_size` bytes, so they are never held in memory as a whole.
+    Files nested in other parameters (e.g. the media of sendMediaGroup) are uploaded under
+    generated names and referenced with "attach://<name>".
+    """
+    def __init__(
+        self,
+        fields: Dict[str, str],
+        files: Dict[str, InputFile],
+        chunk_size: int = 64 * 1024,
+        ):
+        self.fields = fields
+        self.files = files
+        self.chunk_size = chunk_size
+        self.boundary = uuid4().hex
+
+        # start of the seekable file objects, the body is streamed again from there on retries
+        self._positions = {
+            name: input_file.file.tell()
+            for name, input_file in files.items()
+            if _is_file_object(input_file.file) and input_file.file.seekable()
+        }
+
+    @classmethod
+    def from_params(
+        cls,
+        params: dict,
+        chunk_size: int = 64 * 1024,
+        ) -> Optional["MultipartUpload"]:
+        """Returns the upload of the call parameters, or None if no file has to be uploaded."""
+        # nearly every call has no file, they are found without building the fields
+        if not any(_holds_files(value) for value in params.values()):
+            return None
+        files = {}
+
+        def attach(input_file: InputFile) -> str:
+            name = f"file{len(files)}"
+            files[name] = input_file
+            return f"attach://{name}"
+
+        def walk(value):
+            if isinstance(value, InputFile):
+                return attach(value)
+            if isinstance(value, TelegramType):
+                return {
+                    field.alias: walk(getattr(value, name))
+                    for name, field in value.__fields__.items()
+                    if getattr(value, name) is not None
+                }
+            if isinstance(value, (list, tuple)):
+                return [walk(v) for v in value]
+            if isinstance(value, dict):
+                return {k: walk(v) for k, v in value.items()}
+            return value
+
+        fields = {}
+        for key, value in params.items():
+            if isinstance(value, InputFile):
+                files[key] = value
+                continue
+            value = walk(value)
+            fields[key] = value if isinstance(value, str) else json_dumps(value)
+
+        if not files:
+            return None
+        return cls(fields, files, chunk_size)
+
+    @property
+    def replayable(self) -> bool:
+        """Async iterators and unseekable file objects can be streamed only once."""
+        return all(
+            not hasattr(f.file, '__aiter__')
+            and (not _is_file_object(f.file) or name in self._positions)
+            for name, f in self.files.items()
+        )
+
+    def _field_header(self, name: str) -> bytes:
+        return (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+        ).encode()
+
+    def _file_header(self, name: str, input_file: InputFile) -> bytes:
+        filename = input_file.filename or _filename(input_file.file) or name
+        mime_type = input_file.mime_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        filename = filename.replace('"', '%22').replace('\r', '').replace('\n', '')
+        return (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {mime_type}\r\n\r\n'
+        ).encode()
+
+    def _file_size(self, name: str, source) -> Optional[int]:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return len(source)
+        if isinstance(source, (str, os.PathLike)):
+            return os.path.getsize(source)
+        if name in self._positions:
+            end = source.seek(0, os.SEEK_END)
+            source.seek(self._positions[name])
+            return end - self._positions[name]
+        return None
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers = {'Content-Type': f'multipart/form-data; boundary={self.boundary}'}
+        length = len(f'--{self.boundary}--\r\n')
+        for name, value in self.fields.items():
+            length += len(self._field_header(name)) + len(value.encode()) + 2
+        for name, input_file in self.files.items():
+            size = self._file_size(name, input_file.file)
+            if size is None:
+                return headers # sent with chunked transfer encoding
+            length += len(self._file_header(name, input_file)) + size + 2
+        headers['Content-Length'] = str(length)
+        return headers
+
+    async def _chunks(self, name: str, source) -> AsyncIterator[bytes]:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            yield bytes(source)
+        elif isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                async for chunk in _read_chunks(f, self.chunk_size):
+                    yield chunk
+        elif _is_file_object(source):
+            if name in self._positions:
+                source.seek(self._positions[name])
+            async for chunk in _read_chunks(source, self.chunk_size):
+                yield chunk
+        elif hasattr(source, '__aiter__'):
+            async for chunk in source:
+                yield chunk
+        else:
+            raise TypeError(
+                "InputFile.file must be a path, bytes, a binary file object or an async iterator,"
+                f" got {type(source)}"
+            )
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """Yields the body of the request, a new stream is started on every call."""
+        for name, value in self.fields.items():
+            yield self._field_header(name) + value.encode() + b'\r\n'
+        for name, input_file in self.files.items():
+            yield self._file_header(name, input_file)
+            async for chunk in self._chunks(name, input_file.file):
+                yield chunk
+            yield b'\r\n'
+        yield f'--{self.boundary}--\r\n'.encode()
+
+
+class FileIdCache:
+    """
+    Maps the content hash of uploaded files to the file_id Telegram returned for them, so sending
+    the same content again references the file_id instead of uploading it. Entries are kept in
+    memory (the `max_size` most recent ones) and in `collection` if a database is set.
+    Async iterators can't be hashed without consuming them and are always uploaded.
+    """
+    def __init__(
+        self,
+        collection: Collection = None,
+        max_size: int = 10000,
+        chunk_size: int = 64 * 1024,
+        ):
+        self.collection = collection
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.memory: OrderedDict = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        file_id = self.memory.get(key)
+        if file_id is not None:
+            self.memory.move_to_end(key)
+        elif self.collection is not None:
+            document = self.collection.find_one({'_id': key})
+            if document:
+                file_id = document['file_id']
+                self._remember(key, file_id)
+        return file_id
+
+    def set(self, key: str, file_id: str):
+        self._remember(key, file_id)
+        if self.collection is not None:
+            self.collection.update_one({'_id': key}, {'$set': {'file_id': file_id}}, upsert= True)
+
+    def _remember(self, key: str, file_id: str):
+        self.memory[key] = file_id
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last= False)
+
+    async def _hash(self, input_file: InputFile) -> Optional[str]:
+        source = input_file.file
+        digest = hashlib.sha256()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            digest.update(source)
+        elif isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                async for chunk in _read_chunks(f, self.chunk_size):
+                    digest.update(chunk)
+        elif _is_file_object(source) and source.seekable():
+            position = source.tell()
+            async for chunk in _read_chunks(source, self.chunk_size):
+                digest.update(chunk)
+            source.seek(position)
+        else:
+            return None
+        return digest.hexdigest()
+
+    async def _lookup(self, kind: str, input_file: InputFile) -> Tuple[Optional[str], Optional[str]]:
+        """Returns the cache key of the file and its file_id if it was uploaded before."""
+        digest = await self._hash(input_file)
+        if digest is None:
+            return None, None
+        key = f"{kind}:{digest}"
+        return key, self.get(key)
+
+    async def substitute(self, method: str, params: dict) -> Tuple[dict, List[tuple]]:
+        """
+        Replaces the files of the call that were uploaded before with their file_id. Returns the new
+        parameters and the files to store once the call succeeds, as (key, index in a media group, field).
+        """
+        pending = []
+        if method == "sendMediaGroup":
+            media = list(params.get('media') or [])
+            for i, item in enumerate(media):
+                if not isinstance(getattr(item, 'media', None), InputFile):
+                    continue
+                key, file_id = await self._lookup(item.type, item.media)
+                if file_id:
+                    media[i] = item.copy(update= {'media': file_id})
+                elif key:
+                    pending.append((key, i, item.type))
+            params = {**params, 'media': media}
+        elif method in CACHED_UPLOADS:
+            field = CACHED_UPLOADS[method]
+            if isinstance(params.get(field), InputFile):
+                key, file_id = await self._lookup(field, params[field])
+                if file_id:
+                    params = {**params, field: file_id}
+                elif key:
+                    pending.append((key, None, field))
+        return params, pending
+
+    def store(self, pending: List[tuple], result):
+        """Remembers the file_id of the files uploaded by a call, from its decoded result."""
+        for key, index, field in pending:
+            message = result[index] if index is not None else result
+            uploaded = message.get(field) if isinstance(message, dict) else None
+            if isinstance(uploaded, list): # the largest PhotoSize
+                uploaded = uploaded[-1] if uploaded else None
+            if uploaded and uploaded.get('file_id'):
+                self.set(key, uploaded['file_id'])
+
+
+class _Transfer:
+    """One HTTP download of a file into a temporary file, which its readers follow as it grows."""
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(prefix= "tbot-", suffix= ".part")
+        self.file = os.fdopen(fd, 'wb')
+        self.size = 0
+        self.done = False
+        self.error: BaseException = None
+        self.readers = 0
+        self.task: asyncio.Task = None
+        self.changed = asyncio.Event() # replaced every time it's set
+
+    def write(self, chunk: bytes):
+        self.file.write(chunk)
+        self.file.flush()
+
+    def wake(self):
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class FileDownloader:
+    """
+    Downloads the files of getFile in chunks. The file_path of every file_id is cached until its link
+    expires, and at most `max_concurrent` files are transferred at once. Simultaneous downloads of one
+    file_id share a single transfer, whatever their destination: the file is fetched once into a
+    temporary file that each of them reads as it grows.
+
+    Keyword arguments:
+
+    :param bot (TelegramBot): The bot the files are downloaded with
+    :param max_concurrent (Integer, Optional): Number of files transferred at once. Defaults to 4.
+    :param chunk_size (Integer, Optional): Size of the chunks in bytes. Defaults to 64 KB.
+    :param path_ttl (Float, Optional): Seconds a file_path is reused for, links are valid for at least an hour.
+    """
+    def __init__(
+        self,
+        bot,
+        max_concurrent: int = 4,
+        chunk_size: int = 64 * 1024,
+        path_ttl: float = 55 * 60,
+        ):
+        self.bot = bot
+        self.max_concurrent = max_concurrent
+        self.chunk_size = chunk_size
+        self.path_ttl = path_ttl
+        self.paths: Dict[str, Tuple[str, float]] = {} # file_id -> (file_path, expiry)
+        self._resolving: Dict[str, asyncio.Future] = {}
+        self._transfers: Dict[str, _Transfer] = {}
+        self._downloads: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._semaphore: asyncio.Semaphore = None
+
+    async def file_path(self, file_id: str, refresh: bool = False) -> str:
+        """Returns the file_path of `file_id`, calling getFile only if the cached one expired."""
+        cached = self.paths.get(file_id)
+        if cached and cached[1] > time.monotonic() and not refresh:
+            return cached[0]
+        if file_id not in self._resolving:
+            self._resolving[file_id] = asyncio.ensure_future(self._resolve(file_id))
+        return await asyncio.shield(self._resolving[file_id])
+
+    async def _resolve(self, file_id: str) -> str:
+        try:
+            file = await self.bot.getFile(file_id)
+            file_path = file['file_path'] if isinstance(file, dict) else file.file_path
+            self.paths[file_id] = (file_path, time.monotonic() + self.path_ttl)
+            return file_path
+        finally:
+            del self._resolving[file_id]
+
+    def _url(self, file_path: str) -> str:
+        return f"{self.bot.api_url}/file/bot{self.bot.token}/{file_path}"
+
+    async def iter_chunks(self, file_id: str) -> AsyncIterator[bytes]:
+        """Yields the contents of the file in chunks."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        if self.bot.local_mode:
+            file_path = await self.file_path(file_id)
+            if os.path.isabs(file_path):
+                async with self._semaphore:
+                    with open(file_path, 'rb') as f:
+                        async for chunk in _read_chunks(f, self.chunk_size):
+                            yield chunk
+                return
+
+        transfer = self._transfers.get(file_id)
+        if transfer is None:
+            transfer = self._transfers[file_id] = _Transfer()
+            transfer.task = asyncio.ensure_future(self._fetch(file_id, transfer))
+        transfer.readers += 1
+        loop = asyncio.get_event_loop()
+        try:
+            with open(transfer.path, 'rb') as f:
+                position = 0
+                while True:
+                    changed = transfer.changed
+                    if position < transfer.size:
+                        size = min(self.chunk_size, transfer.size - position)
+                        chunk = await loop.run_in_executor(None, f.read, size)
+                        position += len(chunk)
+                        yield chunk
+                    elif transfer.done:
+                        if transfer.error is not None:
+                            raise transfer.error
+                        return
+                    else:
+                        await changed.wait()
+        finally:
+            transfer.readers -= 1
+            if not transfer.readers and not transfer.done:
+                transfer.task.cancel() # nobody reads it anymore
+            self._release(transfer)
+
+    async def _fetch(self, file_id: str, transfer: _Transfer):
+        loop = asyncio.get_event_loop()
+        try:
+            async with self._semaphore:
+                client = self.bot._open_client()
+                for refresh in (False, True):
+                    url = self._url(await self.file_path(file_id, refresh))
+                    async with client.stream("GET", url) as r:
+                        if r.status_code == 404 and not refresh:
+                            continue # the link expired earlier than expected
+                        r.raise_for_status()
+                        async for chunk in r.aiter_bytes(self.chunk_size):
+                            await loop.run_in_executor(None, transfer.write, chunk)
+                            transfer.size += len(chunk)
+                            transfer.wake()
+                        break
+        except BaseException as e:
+            # raised by the readers, the task itself ends quietly unless it was cancelled
+            transfer.error = e
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            transfer.file.close()
+            transfer.done = True
+            transfer.wake()
+            if self._transfers.get(file_id) is transfer:
+                del self._transfers[file_id]
+            self._release(transfer)
+
+    @staticmethod
+    def _release(transfer: _Transfer):
+        # the temporary file is removed once the transfer and its readers are over
+        if transfer.done and not transfer.readers and os.path.exists(transfer.path):
+            os.remove(transfer.path)
+
+    async def download(self, file_id: str, dest: Union[str, os.PathLike, BinaryIO]):
+        """
+        Writes the file to the path or the binary file object `dest`. Paths are written through
+        a temporary ".part" file, so they never hold a partial download.
+        """
+        if _is_file_object(dest):
+            return await self._write(file_id, dest)
+        # two downloads to the same path would write the same ".part" file
+        key = (file_id, os.fspath(dest))
+        if key not in self._downloads:
+            self._downloads[key] = asyncio.ensure_future(self._download_to_path(file_id, dest))
+            self._downloads[key].add_done_callback(lambda _: self._downloads.pop(key, None))
+        return await asyncio.shield(self._downloads[key])
+
+    async def _download_to_path(self, file_id: str, dest) -> str:
+        part = f"{os.fspath(dest)}.part"
+        try:
+            with open(part, 'wb') as f:
+                await self._write(file_id, f)
+            os.replace(part, dest)
+        except BaseException:
+            if os.path.exists(part):
+                os.remove(part)
+            raise
+        return os.fspath(dest)
+
+    async def _write(self, file_id: str, f: BinaryIO):
+        loop = asyncio.get_event_loop()
+        async for chunk in self.iter_chunks(file_id):
+            await loop.run_in_executor(None, f.write, chunk)
+        return f
+
+
+async def _read_chunks(f, chunk_size: int) -> AsyncIterator[bytes]:
+    loop = asyncio.get_event_loop()
+    while True:
+        chunk = await loop.run_in_executor(None, f.read, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+def _file_fields(cls) -> Tuple[str, ...]:
+    """Fields of a TelegramType class whose values may contain an InputFile."""
+    fields = _FILE_FIELDS.get(cls)
+    if fields is None:
+        _FILE_FIELDS[cls] = () # recursive types
+        fields = _FILE_FIELDS[cls] = tuple(
+            name for name, field in cls.__fields__.items()
+            if _type_holds_files(field.outer_type_)
+        )
+    return fields
+
+def _type_holds_files(annotation) -> bool:
+    if annotation is InputFile:
+        return True
+    if isinstance(annotation, type) and issubclass(annotation, TelegramType):
+        # InputMedia stands for any of the InputMedia types, its fields are unknown
+        return annotation is InputMedia or bool(_file_fields(annotation))
+    return any(_type_holds_files(argument) for argument in getattr(annotation, '__args__', ()))
+
+_FILE_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+def _holds_files(value) -> bool:
+    if isinstance(value, InputFile):
+        return True
+    if isinstance(value, TelegramType):
+        return any(_holds_files(getattr(value, name)) for name in _file_fields(type(value)))
+    if isinstance(value, (list, tuple)):
+        return any(_holds_files(v) for v in value)
+    if isinstance(value, dict):
+        return any(_holds_files(v) for v in value.values())
+    return False
+
+def _is_file_object(source) -> bool:
+    return hasattr(source, 'read') and not isinstance(source, (str, bytes, os.PathLike))
+
+def _filename(source) -> Optional[str]:
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(source)
+    name = getattr(source, 'name', None)
+    if isinstance(name, str):
+        return os.path.basename(name)
+    return None
@@ -0,0 +1,103 @@
+import asyncio
+import os
+from typing import List, Tuple
+
+from .types import TelegramType, InputFile
+from .files import _is_file_object, _filename
+
+
+MEDIA_GROUP_SIZE = (2, 10)
+
+# media types that can be sent in the same album, animations can't be sent in albums
+ALBUM_KINDS = {
+    "photo": "visual",
+    "video": "visual",
+    "document": "document",
+    "audio": "audio",
+}
+
+# method sending a media alone, for the ones that can't be part of an album
+SINGLE_METHODS = {
+    "photo": "sendPhoto",
+    "video": "sendVideo",
+    "document": "sendDocument",
+    "audio": "sendAudio",
+    "animation": "sendAnimation",
+}
+
+
+def group_media(media: List[TelegramType]) -> List[List[TelegramType]]:
+    """
+    Splits the media into the albums they are sent in, in order: consecutive media that can be mixed
+    are split into groups of 2 to 10 items of even sizes. A media that can't be grouped with its
+    neighbours is returned alone and sent with its own method.
+    """
+    runs = []
+    for item in media:
+        kind = ALBUM_KINDS.get(item.type)
+        if runs and kind is not None and ALBUM_KINDS.get(runs[-1][0].type) == kind:
+            runs[-1].append(item)
+        else:
+            runs.append([item])
+
+    smallest, largest = MEDIA_GROUP_SIZE
+    groups = []
+    for run in runs:
+        count = -(-len(run) // largest)
+        size, larger = divmod(len(run), count)
+        start = 0
+        for i in range(count):
+            end = start + size + (1 if i < larger else 0)
+            groups.append(run[start:end])
+            start = end
+    return groups
+
+
+def single_call(item: TelegramType) -> Tuple[str, dict]:
+    """Method and parameters sending one media of an album as a message of its own."""
+    params = {
+        name: getattr(item, name)
+        for name in item.__fields__
+        if name not in ('type', 'media') and getattr(item, name) is not None
+    }
+    params[item.type] = item.media
+    return SINGLE_METHODS[item.type], params
+
+
+async def preload(
+    item: TelegramType,
+    max_size: int,
+    ) -> TelegramType:
+    """
+    Reads the files of the media of at most `max_size` bytes into memory, so the call sending them
+    doesn't wait for the disk and can be retried. Bigger files are left to be streamed.
+    """
+    update = {}
+    for name in ('media', 'thumb'):
+        input_file = getattr(item, name, None)
+        if not isinstance(input_file, InputFile):
+            continue
+        source = input_file.file
+        if isinstance(source, (str, os.PathLike)):
+            if os.path.getsize(source) > max_size:
+                continue
+            content = await asyncio.get_event_loop().run_in_executor(None, _read_path, source)
+        elif _is_file_object(source) and source.seekable():
+            position = source.tell()
+            if source.seek(0, os.SEEK_END) - position > max_size:
+                source.seek(position)
+                continue
+            source.seek(position)
+            content = await asyncio.get_event_loop().run_in_executor(None, source.read)
+        else:
+            continue
+        update[name] = input_file.copy(update= {
+            'file': content,
+            'filename': input_file.filename or _filename(source),
+        })
+    return item.copy(update= update) if update else item
+
+
+def _read_path(path) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
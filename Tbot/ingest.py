@@ -0,0 +1,27 @@
+from typing import Any
+
+
+class UpdateView:
+    """
+    Read-only attribute access to the decoded JSON of an update, as the fields of the types of .types:
+    `view.message.from_.id` is `data['message']['from']['id']`, missing fields are None.
+    It lets the filters check an update before (and without) validating it into an Update.
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, data: dict):
+        self._data = data
+
+    def __getattr__(self, name: str) -> Any:
+        return _view(self._data.get('from' if name == 'from_' else name))
+
+    def __repr__(self):
+        return f"UpdateView({self._data!r})"
+
+
+def _view(value):
+    if isinstance(value, dict):
+        return UpdateView(value)
+    if isinstance(value, list):
+        return [_view(v) for v in value]
+    return value
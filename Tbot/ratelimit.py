@@ -0,0 +1,214 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Union, Dict, List
+
+
+# methods that post messages into a chat and count against the flood limits
+RATE_LIMITED_PREFIXES = ("send", "forward", "copy", "edit", "stop")
+RATE_UNLIMITED_METHODS = {"sendChatAction"}
+
+def is_rate_limited(method: str) -> bool:
+    return method.startswith(RATE_LIMITED_PREFIXES) and method not in RATE_UNLIMITED_METHODS
+
+
+class Priority:
+    """
+    Lanes of the outbound traffic, lower values are served first.
+    Answers to queries (answerCallbackQuery, answerInlineQuery, ...) are not rate limited and never wait.
+    """
+    URGENT = 0
+    INTERACTIVE = 1  # calls made while handling a live update
+    NORMAL = 2
+    BULK = 3         # broadcasts and other background jobs
+
+# priority of the calls made in the current task
+current_priority: ContextVar = ContextVar('current_priority', default= Priority.NORMAL)
+
+@contextmanager
+def priority(level: int):
+    """Runs the calls made in the block with the given Priority, e.g. `with priority(Priority.BULK): ...`"""
+    token = current_priority.set(level)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+def is_group_chat(chat_id: Union[int, str]) -> bool:
+    """Groups, supergroups and channels have negative ids or are addressed by @username."""
+    try:
+        return int(chat_id) < 0
+    except ValueError:
+        return True
+
+
+class TokenBucket:
+    """
+    A bucket refilled continuously with `rate` tokens per second, holding at most `capacity` tokens.
+    """
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1,
+        ):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds left until a token is available."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    @property
+    def idle(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    """
+    Schedules outbound calls under the Bot API flood limits: a global bucket shared by all the chats
+    and one bucket per chat (`private_rate` for private chats, `group_rate` for groups and channels).
+    Waiting calls are served by Priority lane, and inside a lane the chats are served round robin,
+    so a busy chat can't hold back the others. A lane that had calls ready while `starvation_limit`
+    slots in a row went to higher lanes gets the next slot.
+
+    Keyword arguments:
+
+    :param global_rate (Float, Optional): Messages per second over all the chats. Defaults to 30.
+    :param private_rate (Float, Optional): Messages per second in one private chat. Defaults to 1.
+    :param group_rate (Float, Optional): Messages per second in one group or channel. Defaults to 20 per minute.
+    :param max_buckets (Integer, Optional): Number of chat buckets kept before the idle ones are dropped.
+    :param starvation_limit (Integer, Optional): Slots a ready lane may be skipped in a row. Defaults to 10.
+    """
+    def __init__(
+        self,
+        global_rate: float = 30,
+        private_rate: float = 1,
+        group_rate: float = 20/60,
+        max_buckets: int = 10000,
+        starvation_limit: int = 10,
+        ):
+        self.global_bucket = TokenBucket(global_rate)
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.max_buckets = max_buckets
+        self.starvation_limit = starvation_limit
+        self.chat_buckets: Dict[Union[int, str], TokenBucket] = {}
+
+        # for each lane, chat_id -> futures of the calls waiting for a slot, in round robin order
+        lanes = range(Priority.URGENT, Priority.BULK + 1)
+        self._waiting: List[OrderedDict] = [OrderedDict() for _ in lanes]
+        self._skipped: List[int] = [0 for _ in lanes]
+        self._wakeup: asyncio.Event = None
+        self._pump_task: asyncio.Task = None
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= self.max_buckets:
+                self.chat_buckets = {
+                    k: b for k, b in self.chat_buckets.items()
+                    if not b.idle or any(k in waiting for waiting in self._waiting)
+                }
+            bucket = TokenBucket(
+                self.group_rate if is_group_chat(chat_id) else self.private_rate
+            )
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def acquire(
+        self,
+        chat_id: Union[int, str] = None,
+        priority: int = None,
+        ):
+        """
+        Waits until a message can be sent to `chat_id`. Calls without a chat only wait for the global bucket.
+        The lane defaults to the priority of the current task.
+        """
+        lane = current_priority.get() if priority is None else priority
+        future = asyncio.get_event_loop().create_future()
+        self._waiting[lane].setdefault(chat_id, deque()).append(future)
+        if self._pump_task is None or self._pump_task.done():
+            self._wakeup = asyncio.Event()
+            self._pump_task = asyncio.ensure_future(self._pump())
+        else:
+            self._wakeup.set()
+        await future
+
+    async def _sleep(self, delay: float):
+        # new waiters wake the pump up, they may be ready before the current ones
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    def _next_ready(self, lane: int):
+        """Returns the first chat of `lane` that has a token, or the time until one has."""
+        waiting = self._waiting[lane]
+        wait = None
+        for chat_id, futures in list(waiting.items()):
+            while futures and futures[0].done(): # cancelled calls
+                futures.popleft()
+            if not futures:
+                del waiting[chat_id]
+                continue
+            delay = 0 if chat_id is None else self._chat_bucket(chat_id).delay()
+            if delay == 0:
+                return chat_id, 0
+            wait = delay if wait is None else min(wait, delay)
+        return None, wait
+
+    async def _pump(self):
+        while any(self._waiting):
+            delay = self.global_bucket.delay()
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+
+            ready = {}
+            wait = None
+            for lane in range(len(self._waiting)):
+                chat_id, lane_wait = self._next_ready(lane)
+                if lane_wait == 0:
+                    ready[lane] = chat_id
+                elif lane_wait is not None:
+                    wait = lane_wait if wait is None else min(wait, lane_wait)
+            if not ready:
+                if wait is not None:
+                    await self._sleep(wait)
+                continue
+
+            starved = [lane for lane in ready if self._skipped[lane] >= self.starvation_limit]
+            lane = starved[0] if starved else min(ready)
+            for other in ready:
+                self._skipped[other] = 0 if other == lane else self._skipped[other] + 1
+
+            chat_id = ready[lane]
+            waiting = self._waiting[lane]
+            futures = waiting[chat_id]
+            self.global_bucket.take()
+            if chat_id is not None:
+                self._chat_bucket(chat_id).take()
+            futures.popleft().set_result(None)
+            if futures:
+                waiting.move_to_end(chat_id)
+            else:
+                del waiting[chat_id]
@@ -0,0 +1,125 @@
+from typing import Union, List, Callable, Dict
+
+from pydantic import parse_obj_as
+
+from .types import *
+
+
+# type of the `result` field returned by every Bot API method
+RETURN_TYPES = {
+    "getUpdates": List[Update],
+    "setWebhook": bool,
+    "deleteWebhook": bool,
+    "getWebhookInfo": WebhookInfo,
+    "getMe": User,
+    "logOut": bool,
+    "close": bool,
+    "sendMessage": Message,
+    "forwardMessage": Message,
+    "copyMessage": MessageId,
+    "sendPhoto": Message,
+    "sendAudio": Message,
+    "sendDocument": Message,
+    "sendVideo": Message,
+    "sendAnimation": Message,
+    "sendVoice": Message,
+    "sendVideoNote": Message,
+    "sendMediaGroup": List[Message],
+    "sendLocation": Message,
+    "editMessageLiveLocation": Union[Message, bool],
+    "stopMessageLiveLocation": Union[Message, bool],
+    "sendVenue": Message,
+    "sendContact": Message,
+    "sendPoll": Message,
+    "sendDice": Message,
+    "sendChatAction": bool,
+    "getUserProfilePhotos": UserProfilePhotos,
+    "getFile": File,
+    "banChatMember": bool,
+    "unbanChatMember": bool,
+    "restrictChatMember": bool,
+    "promoteChatMember": bool,
+    "setChatAdministratorCustomTitle": bool,
+    "setChatPermissions": bool,
+    "exportChatInviteLink": str,
+    "createChatInviteLink": ChatInviteLink,
+    "editChatInviteLink": ChatInviteLink,
+    "revokeChatInviteLink": ChatInviteLink,
+    "setChatPhoto": bool,
+    "deleteChatPhoto": bool,
+    "setChatTitle": bool,
+    "setChatDescription": bool,
+    "pinChatMessage": bool,
+    "unpinChatMessage": bool,
+    "unpinAllChatMessages": bool,
+    "leaveChat": bool,
+    "getChat": Chat,
+    "getChatAdministrators": List[ChatMember],
+    "getChatMemberCount": int,
+    "getChatMember": ChatMember,
+    "setChatStickerSet": bool,
+    "deleteChatStickerSet": bool,
+    "answerCallbackQuery": bool,
+    "setMyCommands": bool,
+    "deleteMyCommands": bool,
+    "getMyCommands": List[BotCommand],
+    "editMessageText": Union[Message, bool],
+    "editMessageCaption": Union[Message, bool],
+    "editMessageMedia": Union[Message, bool],
+    "editMessageReplyMarkup": Union[Message, bool],
+    "stopPoll": Poll,
+    "deleteMessage": bool,
+    "sendSticker": Message,
+    "getStickerSet": StickerSet,
+    "uploadStickerFile": File,
+    "createNewStickerSet": bool,
+    "addStickerToSet": bool,
+    "setStickerPositionInSet": bool,
+    "deleteStickerFromSet": bool,
+    "setStickerSetThumb": bool,
+    "answerInlineQuery": bool,
+    "sendInvoice": Message,
+    "answerShippingQuery": bool,
+    "answerPreCheckoutQuery": bool,
+    "setPassportDataErrors": bool,
+    "sendGame": Message,
+    "setGameScore": Union[Message, bool],
+    "getGameHighScores": List[GameHighScore],
+}
+
+
+def _make_decoder(return_type) -> Callable:
+    # `Message or True` results only need a model when an object is returned
+    if getattr(return_type, '__origin__', None) is Union:
+        model = next(t for t in return_type.__args__ if isinstance(t, type) and issubclass(t, TelegramType))
+        return lambda result: model.parse_obj(result) if isinstance(result, dict) else result
+    if isinstance(return_type, type) and issubclass(return_type, TelegramType):
+        return return_type.parse_obj
+    if getattr(return_type, '__origin__', None) is list:
+        return lambda result: parse_obj_as(return_type, result)
+    return lambda result: result
+
+# ChatMember is one of these types, told apart by its status
+CHAT_MEMBER_TYPES = {
+    "creator": ChatMemberOwner,
+    "administrator": ChatMemberAdministrator,
+    "member": ChatMemberMember,
+    "restricted": ChatMemberRestricted,
+    "left": ChatMemberLeft,
+    "kicked": ChatMemberBanned,
+}
+
+def decode_chat_member(result: dict) -> TelegramType:
+    return CHAT_MEMBER_TYPES.get(result.get('status'), ChatMember).parse_obj(result)
+
+DECODERS: Dict[str, Callable] = {
+    method: _make_decoder(return_type) for method, return_type in RETURN_TYPES.items()
+}
+DECODERS["getChatMember"] = decode_chat_member
+DECODERS["getChatAdministrators"] = lambda result: [decode_chat_member(member) for member in result]
+
+
+def decode_result(method: str, result):
+    """Builds the typed return value of `method` from the decoded `result` of its answer."""
+    decoder = DECODERS.get(method)
+    return decoder(result) if decoder else result
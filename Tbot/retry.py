@@ -0,0 +1,79 @@
+import random
+from typing import Optional
+
+import httpx
+
+from .types import ResponseParameters
+
+
+# methods that may have taken effect even if the server answered with an error,
+# repeating them could send a message or create an object twice
+UNSAFE_PREFIXES = ("send", "forward", "copy", "create", "export", "upload", "add")
+
+def is_safe_to_repeat(method: str) -> bool:
+    return not method.startswith(UNSAFE_PREFIXES)
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed Bot API call is sent again and after how long.
+
+    429 answers were not executed by Telegram, so every method is retried after the `retry_after`
+    of their ResponseParameters. 5xx answers and broken connections are only retried for methods
+    that are safe to repeat. Connections that couldn't be opened at all are always retried.
+
+    Keyword arguments:
+
+    :param max_retries (Integer, Optional): Number of retries allowed for one call. Defaults to 3.
+    :param backoff (Float, Optional): Base of the exponential backoff in seconds. Defaults to 0.5.
+    :param max_backoff (Float, Optional): Upper bound of one backoff in seconds. Defaults to 30.
+    :param max_retry_after (Float, Optional): Longest `retry_after` waited for, the call fails with the 429 beyond. Defaults to 60.
+    """
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+        max_retry_after: float = 60,
+        ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return delay * (0.5 + random.random() / 2)
+
+    def on_response(
+        self,
+        method: str,
+        attempt: int,
+        status_code: int,
+        data: Optional[dict],
+        ) -> Optional[float]:
+        """Returns the seconds to wait before sending the call again, or None to give up."""
+        if attempt >= self.max_retries:
+            return None
+        if status_code == 429:
+            parameters = ResponseParameters(**((data or {}).get('parameters') or {}))
+            if parameters.retry_after is not None:
+                # a long flood wait would hold the caller, it rather gets the TelegramError
+                return parameters.retry_after if parameters.retry_after <= self.max_retry_after else None
+            return self._backoff(attempt)
+        if status_code >= 500 and is_safe_to_repeat(method):
+            return self._backoff(attempt)
+        return None
+
+    def on_error(
+        self,
+        method: str,
+        attempt: int,
+        error: httpx.TransportError,
+        ) -> Optional[float]:
+        """Returns the seconds to wait before sending the call again, or None to raise the error."""
+        if attempt >= self.max_retries:
+            return None
+        if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)) or is_safe_to_repeat(method):
+            return self._backoff(attempt)
+        return None
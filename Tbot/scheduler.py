@@ -0,0 +1,226 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Union
+from uuid import uuid4
+
+import httpx
+from pymongo.collection import Collection
+
+from .exceptions import TelegramError
+from .ratelimit import Priority, current_priority
+from .utils import json_loads, json_dumps
+from .webhook import current_webhook_reply
+
+
+class Job:
+    __slots__ = ('id', 'due', 'method', 'params')
+
+    def __init__(self, id: str, due: float, method: str, params: dict):
+        self.id = id
+        self.due = due # unix time
+        self.method = method
+        self.params = params
+
+
+class TimerWheel:
+    """
+    Hierarchical timer wheel: `levels` wheels of `slots` buckets, a bucket of level L covering
+    slots**L ticks. A job is put in the coarsest level it fits in and moved down to the finer ones
+    as its time comes closer, so scheduling and expiring a job are O(1) whatever the number of jobs.
+    Jobs further than the top wheel wait in its buckets until they fit.
+
+    Keyword arguments:
+
+    :param tick (Float, Optional): Seconds per tick, the precision of the timers. Defaults to 1.
+    :param slots (Integer, Optional): Buckets per wheel, a power of 2. Defaults to 64.
+    :param levels (Integer, Optional): Number of wheels. Defaults to 4, about 194 days with the defaults.
+    """
+    def __init__(
+        self,
+        tick: float = 1,
+        slots: int = 64,
+        levels: int = 4,
+        ):
+        assert slots & (slots - 1) == 0, "slots must be a power of 2"
+        self.tick = tick
+        self.bits = slots.bit_length() - 1
+        self.mask = slots - 1
+        self.levels = levels
+        self.wheels: List[List[list]] = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.current = int(time.time() / tick)
+        self.due: List[Job] = []
+        self.size = 0 # jobs in the wheels
+
+    def add(self, job: Job):
+        expiry = int(job.due / self.tick)
+        delta = expiry - self.current
+        if delta <= 0:
+            self.due.append(job)
+            return
+        level = 0
+        while level < self.levels - 1 and delta >> (self.bits * (level + 1)):
+            level += 1
+        self.wheels[level][(expiry >> (self.bits * level)) & self.mask].append(job)
+        self.size += 1
+
+    def advance(self, now: float) -> List[Job]:
+        """Moves the wheels up to `now` and returns the jobs that are due."""
+        target = int(now / self.tick)
+        if not self.size:
+            self.current = max(self.current, target)
+        while self.current < target:
+            self.current += 1
+            # buckets of the coarser levels are spread on the finer ones when their time comes
+            for level in range(1, self.levels):
+                if self.current & ((1 << (self.bits * level)) - 1):
+                    break
+                bucket = self.wheels[level][(self.current >> (self.bits * level)) & self.mask]
+                if bucket:
+                    self.wheels[level][(self.current >> (self.bits * level)) & self.mask] = []
+                    self.size -= len(bucket)
+                    for job in bucket:
+                        self.add(job)
+            bucket = self.wheels[0][self.current & self.mask]
+            if bucket:
+                self.wheels[0][self.current & self.mask] = []
+                self.size -= len(bucket)
+                self.due.extend(bucket)
+        due, self.due = self.due, []
+        return due
+
+
+class Scheduler:
+    """
+    Calls Bot API methods at a later time, e.g. deleting a reply after a minute or sending a reminder.
+    Pending jobs are kept in a TimerWheel and in `collection` if a database is set, they are loaded
+    again by `start` after a restart. A job is removed from the collection right before its call, so
+    bots sharing the database don't make it twice, and a job whose call is cut by a crash is not made again.
+    Calls that fail before reaching the API are tried again after `retry_delay` seconds.
+
+    Keyword arguments:
+
+    :param bot (TelegramBot): The bot making the calls
+    :param collection (Collection, Optional): Where the pending jobs are persisted
+    :param wheel (TimerWheel, Optional): The wheel holding the jobs in memory
+    :param max_concurrent (Integer, Optional): Number of due calls made at once. Defaults to 100.
+    :param retry_delay (Float, Optional): Seconds before a call that failed is tried again. Defaults to 60.
+    """
+    def __init__(
+        self,
+        bot,
+        collection: Collection = None,
+        wheel: TimerWheel = None,
+        max_concurrent: int = 100,
+        retry_delay: float = 60,
+        ):
+        self.bot = bot
+        self.collection = collection
+        self.wheel = wheel or TimerWheel()
+        self.max_concurrent = max_concurrent
+        self.retry_delay = retry_delay
+        self.jobs: Dict[str, Job] = {}
+        self._running: set = set()
+        self._pump_task: asyncio.Task = None
+        self._loaded = False
+
+    def __len__(self):
+        return len(self.jobs)
+
+    async def start(self):
+        """Loads the jobs persisted in the collection and starts running the due ones."""
+        if not self._loaded and self.collection is not None:
+            self._loaded = True
+            cursor = self.collection.find({})
+            loop = asyncio.get_event_loop()
+            # read in the executor, there may be millions of them
+            while True:
+                batch = await loop.run_in_executor(None, _next_batch, cursor, 10000)
+                if not batch:
+                    break
+                for document in batch:
+                    if document['_id'] not in self.jobs:
+                        self._add(Job(document['_id'], document['due'], document['method'], document['params']))
+        self._wake()
+
+    async def stop(self):
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            self._pump_task = None
+
+    def schedule(
+        self,
+        when: Union[float, datetime],
+        method: str,
+        params: dict,
+        ) -> str:
+        """Schedules the call in `when` seconds, or at the datetime `when`. Returns the id of the job."""
+        due = when.timestamp() if isinstance(when, datetime) else time.time() + when
+        # stored as plain JSON values, the TelegramType parameters are serialized
+        job = Job(uuid4().hex, due, method, json_loads(json_dumps(params)))
+        if self.collection is not None:
+            self.collection.insert_one({'_id': job.id, 'due': job.due, 'method': job.method, 'params': job.params})
+        self._add(job)
+        self._wake()
+        return job.id
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a pending job, returns False if it was already made or cancelled."""
+        job = self.jobs.pop(job_id, None)
+        if self.collection is not None:
+            return self.collection.delete_one({'_id': job_id}).deleted_count > 0
+        return job is not None
+
+    def _add(self, job: Job):
+        self.jobs[job.id] = job
+        self.wheel.add(job)
+
+    def _wake(self):
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.ensure_future(self._pump())
+
+    async def _pump(self):
+        # the pump may be started by a handler, its calls don't belong to the update
+        current_priority.set(Priority.NORMAL)
+        current_webhook_reply.set(None)
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        while self.jobs:
+            for job in self.wheel.advance(time.time()):
+                # cancelled jobs stay in the wheel until their time
+                if self.jobs.get(job.id) is not job:
+                    continue
+                await semaphore.acquire()
+                task = asyncio.ensure_future(self._run(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+                task.add_done_callback(lambda _: semaphore.release())
+            await asyncio.sleep(self.wheel.tick)
+
+    async def _run(self, job: Job):
+        if self.jobs.pop(job.id, None) is not job:
+            return
+        if self.collection is not None:
+            claimed = await asyncio.get_event_loop().run_in_executor(
+                None, self.collection.find_one_and_delete, {'_id': job.id}
+            )
+            if claimed is None:
+                return # cancelled, or made by another bot sharing the database
+        try:
+            await self.bot(job.method, job.params)
+        except TelegramError:
+            pass # answered by the API, e.g. the message to delete is already gone
+        except (httpx.TransportError, asyncio.TimeoutError):
+            job.due = time.time() + self.retry_delay
+            if self.collection is not None:
+                self.collection.insert_one({'_id': job.id, 'due': job.due, 'method': job.method, 'params': job.params})
+            self._add(job)
+            self._wake()
+
+
+def _next_batch(cursor, size: int) -> list:
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) == size:
+            break
+    return batch
@@ -0,0 +1,272 @@
+import html
+import re
+from typing import List, Tuple, Optional
+
+from .types import MessageEntity
+
+
+MAX_MESSAGE_LENGTH = 4096
+
+# boundaries a text is preferably split on, in order of preference
+SPLIT_SEPARATORS = ("\n\n", "\n", " ")
+
+HTML_TOKEN = re.compile(r"(<[^>]*>)|([^<]+)")
+HTML_TAG_NAME = re.compile(r"</?\s*([a-zA-Z0-9-]+)")
+HTML_EMPTY_ELEMENT = re.compile(r"<([a-zA-Z0-9-]+)(\s[^>]*)?></\1>")
+
+# entity markers of MarkdownV2, the longer ones first, and of the legacy Markdown
+MARKDOWN_V2_MARKERS = ("```", "||", "__", "*", "_", "~", "`")
+MARKDOWN_MARKERS = ("```", "*", "_", "`")
+MARKDOWN_LINK = re.compile(r"\[(?:\\.|[^\]\\])*\]\((?:\\.|[^)\\])*\)")
+MARKDOWN_PRE_OPENING = re.compile(r"```[^\s`]*\n?")
+
+
+def utf16_len(text: str) -> int:
+    """Length of the text in UTF-16 code units, the unit of the Bot API limits and entity offsets."""
+    return len(text) + sum(1 for c in text if ord(c) > 0xFFFF)
+
+
+def _fit(text: str, limit: int) -> int:
+    """Index of the longest prefix of `text` not longer than `limit` UTF-16 code units."""
+    units = 0
+    for i, c in enumerate(text):
+        units += 2 if ord(c) > 0xFFFF else 1
+        if units > limit:
+            return i
+    return len(text)
+
+
+def _cut(text: str, limit: int, hard: bool = True) -> Optional[Tuple[int, int]]:
+    """
+    Returns where the text is split to fit in `limit` and where the next chunk starts, the separator
+    between them is dropped. Without a separator the text is cut at the limit only if `hard` is True.
+    """
+    end = _fit(text, limit)
+    if end == len(text):
+        return end, end
+    fallback = None
+    for separator in SPLIT_SEPARATORS:
+        position = text.rfind(separator, 0, end)
+        if position > 0:
+            if position >= end // 2:
+                return position, position + len(separator)
+            fallback = fallback or (position, position + len(separator))
+    if fallback:
+        return fallback
+    return (end, end) if hard else None
+
+
+def _entity_fields(entity) -> dict:
+    if isinstance(entity, MessageEntity):
+        return entity.dict(exclude_none= True)
+    return dict(entity)
+
+
+def split_text(
+    text: str,
+    entities: List[MessageEntity] = None,
+    limit: int = MAX_MESSAGE_LENGTH,
+    ) -> List[Tuple[str, Optional[List[MessageEntity]]]]:
+    """
+    Splits a plain text on paragraph, line or word boundaries into chunks of at most `limit` UTF-16
+    code units. Entities are clipped to the chunks they overlap, with offsets relative to their chunk.
+    """
+    chunks = []
+    start = 0 # in characters
+    start_units = 0 # in UTF-16 code units
+    while True:
+        rest = text[start:]
+        cut, resume = _cut(rest, limit)
+        chunk = rest[:cut]
+        chunk_units = utf16_len(chunk)
+
+        chunk_entities = None
+        if entities:
+            chunk_entities = []
+            for entity in entities:
+                fields = _entity_fields(entity)
+                begin = max(fields['offset'], start_units)
+                end = min(fields['offset'] + fields['length'], start_units + chunk_units)
+                if end > begin:
+                    fields.update(offset= begin - start_units, length= end - begin)
+                    chunk_entities.append(MessageEntity(**fields))
+        chunks.append((chunk, chunk_entities or None))
+
+        if resume >= len(rest):
+            return chunks
+        start_units += utf16_len(rest[:resume])
+        start += resume
+
+
+def split_html(
+    text: str,
+    limit: int = MAX_MESSAGE_LENGTH,
+    ) -> List[str]:
+    """
+    Splits a text formatted with HTML into chunks whose visible text is at most `limit` UTF-16 code units.
+    Tags open at a split are closed at the end of the chunk and opened again at the start of the next one.
+    """
+    chunks = []
+    current, length, opened = [], 0, [] # opened: (tag name, opening tag)
+
+    def flush():
+        nonlocal current, length
+        chunk = ''.join(current + [f"</{name}>" for name, _ in reversed(opened)])
+        # tags opened right before the split have their content in the next chunk
+        while HTML_EMPTY_ELEMENT.search(chunk):
+            chunk = HTML_EMPTY_ELEMENT.sub('', chunk)
+        chunks.append(chunk)
+        current, length = [tag for _, tag in opened], 0
+
+    for tag, content in HTML_TOKEN.findall(text):
+        if tag:
+            name = HTML_TAG_NAME.match(tag)
+            name = name.group(1).lower() if name else ''
+            if tag.startswith('</'):
+                for i in range(len(opened) - 1, -1, -1):
+                    if opened[i][0] == name:
+                        del opened[i]
+                        break
+            else:
+                opened.append((name, tag))
+            current.append(tag)
+            continue
+
+        content = html.unescape(content)
+        while content:
+            # a chunk with some text is rather closed at a tag than cut in the middle of a word
+            cut = _cut(content, limit - length, hard= length == 0)
+            if cut is None:
+                flush()
+                continue
+            cut, resume = cut
+            current.append(html.escape(content[:cut], quote= False))
+            length += utf16_len(content[:cut])
+            content = content[resume:]
+            if content:
+                flush()
+    if length or not chunks:
+        chunks.append(''.join(current))
+    return chunks
+
+
+def _markdown_tokens(text: str, version: int) -> List[Tuple[str, str]]:
+    """
+    Splits a Markdown text into ('text', visible text), ('atom', escape sequence or link) and
+    ('marker', entity marker) tokens. In code and, with the legacy Markdown, in any entity, only
+    the closing marker is one.
+    """
+    markers = MARKDOWN_V2_MARKERS if version == 2 else MARKDOWN_MARKERS
+    tokens = []
+    opened = [] # markers of the entities open at the current position
+    position = 0
+    while position < len(text):
+        inside = opened[-1] if opened else None
+        if inside in ("`", "```") or (version == 1 and inside):
+            # no entity starts here, only the current one can end
+            if text[position] == '\\' and version == 2:
+                tokens.append(('atom', text[position:position + 2]))
+                position += 2
+                continue
+            if text.startswith(inside, position):
+                tokens.append(('marker', inside))
+                opened.pop()
+                position += len(inside)
+                continue
+            end = position + 1
+            while end < len(text) and not text.startswith(inside, end) and not (version == 2 and text[end] == '\\'):
+                end += 1
+            tokens.append(('text', text[position:end]))
+            position = end
+            continue
+
+        if text[position] == '\\':
+            tokens.append(('atom', text[position:position + 2]))
+            position += 2
+            continue
+        if text[position] == '[':
+            link = MARKDOWN_LINK.match(text, position)
+            if link:
+                tokens.append(('atom', link.group()))
+                position = link.end()
+                continue
+        marker = next((m for m in markers if text.startswith(m, position)), None)
+        if marker is not None:
+            if marker == "```" and marker not in opened:
+                # the language of a pre block is part of its opening marker
+                tokens.append(('marker', MARKDOWN_PRE_OPENING.match(text, position).group()))
+            else:
+                tokens.append(('marker', marker))
+            if marker in opened:
+                del opened[opened.index(marker):]
+            else:
+                opened.append(marker)
+            position += len(tokens[-1][1])
+            continue
+        end = position + 1
+        while end < len(text) and text[end] not in '\\[' and not any(text.startswith(m, end) for m in markers):
+            end += 1
+        tokens.append(('text', text[position:end]))
+        position = end
+    return tokens
+
+
+def split_markdown(
+    text: str,
+    limit: int = MAX_MESSAGE_LENGTH,
+    version: int = 2,
+    ) -> List[str]:
+    """
+    Splits a text formatted with MarkdownV2 (or the legacy Markdown with `version=1`) into chunks of at
+    most `limit` UTF-16 code units besides the markers. Entities open at a split are closed at the end
+    of the chunk and opened again at the start of the next one, escape sequences and links are never split.
+    """
+    chunks = []
+    current, length, opened = [], 0, [] # opened: (closing marker, opening marker)
+
+    def flush():
+        nonlocal current, length
+        # markers opened right before the split have their content in the next chunk
+        dangling = 0
+        while current and current[-1][0] == 'open':
+            current.pop()
+            dangling += 1
+        kept = opened[:len(opened) - dangling]
+        chunks.append(''.join(value for _, value in current) + ''.join(closing for closing, _ in reversed(kept)))
+        current, length = [('open', opening) for _, opening in opened], 0
+
+    for kind, value in _markdown_tokens(text, version):
+        if kind == 'marker':
+            closing = "```" if value.startswith("```") else value
+            for i in range(len(opened) - 1, -1, -1):
+                if opened[i][0] == closing:
+                    del opened[i:]
+                    current.append(('close', value))
+                    break
+            else:
+                opened.append((closing, value))
+                current.append(('open', value))
+            continue
+
+        if kind == 'atom':
+            size = utf16_len(value)
+            if length and length + size > limit:
+                flush()
+            current.append(('text', value))
+            length += size
+            continue
+
+        while value:
+            cut = _cut(value, limit - length, hard= length == 0)
+            if cut is None:
+                flush()
+                continue
+            cut, resume = cut
+            current.append(('text', value[:cut]))
+            length += utf16_len(value[:cut])
+            value = value[resume:]
+            if value:
+                flush()
+    if length or not chunks:
+        chunks.append(''.join(value for _, value in current))
+    return chunks
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Union, List, Optional
+from typing import Union, List, Optional, Any
 from pydantic import BaseModel, Extra
 
 
@@ -64,9 +64,22 @@ class InputMedia(TelegramType):
 class InputFile(TelegramType):
     """
     This object represents the contents of a file to be uploaded. Must be posted using multipart/form-data in the usual way that files are uploaded via the browser.
+    Keyword arguments:
+
+    :param file (String, Bytes, File object or Async iterator): Path of the file, its contents, a file opened in binary mode or an async iterator of its chunks. Paths and file objects are streamed in chunks.
+    :param filename (String): Optional. Name of the uploaded file, taken from the path or the file object if not given
+    :param mime_type (String): Optional. MIME type of the file, guessed from the filename if not given
     """
+    file: Any
+    filename: Optional[str] = None
+    mime_type: Optional[str] = None
+
+    def __init__(self, file: Any = None, **data):
+        super().__init__(file= file, **data)
+
     class Config:
         extra = Extra.allow
+        arbitrary_types_allowed = True
 
 class InlineQueryResult(TelegramType):
     """
@@ -1033,7 +1046,7 @@ class InputMediaPhoto(TelegramType):
     :param caption_entities (Array of MessageEntity): Optional. List of special entities that appear in the caption, which can be specified instead of parse_mode
     """
     type: str
-    media: str
+    media: Union[InputFile, str]
     caption: Optional[str] = None
     parse_mode: Optional[str] = None
     caption_entities: Optional[List[MessageEntity]] = None
@@ -1056,7 +1069,7 @@ class InputMediaVideo(TelegramType):
     :param supports_streaming (Boolean): Optional. Pass True, if the uploaded video is suitable for streaming
     """
     type: str
-    media: str
+    media: Union[InputFile, str]
     thumb: Optional[Union[InputFile, str]] = None
     caption: Optional[str] = None
     parse_mode: Optional[str] = None
@@ -1083,7 +1096,7 @@ class InputMediaAnimation(TelegramType):
     :param duration (Integer): Optional. Animation duration
     """
     type: str
-    media: str
+    media: Union[InputFile, str]
     thumb: Optional[Union[InputFile, str]] = None
     caption: Optional[str] = None
     parse_mode: Optional[str] = None
@@ -1109,7 +1122,7 @@ class InputMediaAudio(TelegramType):
     :param title (String): Optional. Title of the audio
     """
     type: str
-    media: str
+    media: Union[InputFile, str]
     thumb: Optional[Union[InputFile, str]] = None
     caption: Optional[str] = None
     parse_mode: Optional[str] = None
@@ -1133,7 +1146,7 @@ class InputMediaDocument(TelegramType):
     :param disable_content_type_detection (Boolean): Optional. Disables automatic server-side content type detection for files uploaded using multipart/form-data. Always true, if the document is sent as part of an album.
     """
     type: str
-    media: str
+    media: Union[InputFile, str]
     thumb: Optional[Union[InputFile, str]] = None
     caption: Optional[str] = None
     parse_mode: Optional[str] = None
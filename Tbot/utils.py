@@ -28,4 +28,35 @@ def glance(update):
             "chat_member",
         }:
             if (getattr(update, message_type)):
-                pass # TODO
\ No newline at end of file
+                pass # TODO
+
+try: # orjson is optional, it decodes the Bot API answers several times faster
+    import orjson
+
+    def json_loads(data):
+        return orjson.loads(data)
+
+except ImportError:
+    import json
+
+    def json_loads(data):
+        return json.loads(data)
+
+
+def _encode_default(value):
+    # TelegramType instances are serialized with the names of the Bot API, e.g. "from"
+    if hasattr(value, 'dict'):
+        return value.dict(by_alias= True, exclude_none= True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+try:
+    import orjson
+
+    def json_dumps(value) -> str:
+        return orjson.dumps(value, default= _encode_default).decode()
+
+except ImportError:
+    import json
+
+    def json_dumps(value) -> str:
+        return json.dumps(value, default= _encode_default, separators= (',', ':'))
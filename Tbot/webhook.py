@@ -0,0 +1,45 @@
+from contextvars import ContextVar
+from typing import Optional, Tuple
+
+
+class WebhookReply:
+    """
+    The one method call that can be answered in the HTTP response to a webhook update,
+    instead of being sent in a request of its own. The slot holds the last call of the handlers:
+    when another call is made, the held one is sent first, so the calls keep their order.
+
+    A claimed call returns None, as its result is never known: a handler needing the result
+    (`message.message_id`, the link of `createChatInviteLink`, ...) can't use the webhook reply.
+    """
+    def __init__(self):
+        self.method: str = None
+        self.params: dict = None
+        self.closed = False
+
+    def claim(self, method: str, params: dict) -> bool:
+        """
+        Takes the call if no call is held. The result of getters is always needed, and chat
+        actions would only be shown after the other calls of the handler.
+        """
+        if self.closed or self.method is not None or method.startswith("get") or method == "sendChatAction":
+            return False
+        self.method = method
+        self.params = params
+        return True
+
+    def release(self) -> Optional[Tuple[str, dict]]:
+        """Empties the slot and returns the call it held, to be sent on its own before the next one."""
+        if self.method is None:
+            return None
+        held = (self.method, self.params)
+        self.method = self.params = None
+        return held
+
+    def close(self) -> Optional[dict]:
+        """Returns the body of the webhook response, if a call was claimed."""
+        self.closed = True
+        if self.method is not None:
+            return {'method': self.method, **(self.params or {})}
+
+# reply slot of the webhook update handled by the current task
+current_webhook_reply: ContextVar = ContextVar('current_webhook_reply', default= None)
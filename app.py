@@ -16,7 +16,7 @@ ngrok_webhook = ngrok.connect(addr = 8000, bind_tls=True).public_url
 bot = TelegramBot(
     secret['token'],
     database = Database(r"mongodb://localhost:27017/"),
-    webhook = ngrok.connect(addr = 8000, bind_tls=True).public_url #secret['webhook']
+    webhook = ngrok_webhook #secret['webhook']
     )
 
 bot.listen()
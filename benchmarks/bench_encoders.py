@@ -0,0 +1,68 @@
+"""
+Per-call overhead of building the body of sendMessage: the former `locals()` wrappers with
+`.json()` on nested models and the stdlib encoder of httpx, against the compiled encoders.
+
+    python -m benchmarks.bench_encoders
+"""
+import json
+import timeit
+from typing import Union, List
+
+from Tbot.bot import TelegramBot
+from Tbot.encoders import compile_encoder
+from Tbot.files import MultipartUpload
+from Tbot.types import TelegramType, MessageEntity, InlineKeyboardMarkup, InlineKeyboardButton
+from Tbot.utils import json_dumps
+
+
+class LocalsBot:
+    """The wrapper as it was written before the encoders were compiled."""
+    def __call__(self, method, json_data):
+        return json.dumps(json_data).encode()
+
+    def sendMessage(
+        self,
+        chat_id: Union[int, str],
+        text: str,
+        parse_mode: str = None,
+        entities: List[MessageEntity] = None,
+        disable_web_page_preview: bool = None,
+        disable_notification: bool = None,
+        reply_to_message_id: int = None,
+        allow_sending_without_reply: bool = None,
+        reply_markup: InlineKeyboardMarkup = None,
+        ):
+        kwargs = {
+            k:v.json(exclude_unset= True) if isinstance(v, TelegramType) else v
+            for k,v in locals().items() if k!='self' and v!=None
+        }
+        return self("sendMessage", kwargs)
+
+
+class CompiledBot:
+    def __call__(self, method, json_data):
+        # as TelegramBot._request, which looks for files to upload first
+        if MultipartUpload.from_params(json_data) is None:
+            return json_dumps(json_data).encode()
+
+    sendMessage = compile_encoder(TelegramBot.sendMessage.__wrapped__)
+
+
+def main(number: int = 20000):
+    markup = InlineKeyboardMarkup(inline_keyboard= [[
+        InlineKeyboardButton(text= f"button {i}", callback_data= f"data {i}") for i in range(4)
+    ]])
+    cases = {
+        "plain text": lambda bot: bot.sendMessage(1234567, "Hello there!"),
+        "with reply_markup": lambda bot: bot.sendMessage(
+            1234567, "Hello there!", reply_to_message_id= 42, reply_markup= markup,
+        ),
+    }
+    for name, call in cases.items():
+        for bot in (LocalsBot(), CompiledBot()):
+            seconds = timeit.timeit(lambda: call(bot), number= number)
+            print(f"{name:<20} {type(bot).__name__:<12} {seconds / number * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Time taken by the webhook route to take in an update: the typed route validating the body into an
+Update before anything else, against the `fast_ingest` route filtering the decoded JSON and building
+the Update only when a handler uses it.
+
+    python -m benchmarks.bench_ingest
+"""
+import asyncio
+import itertools
+import json
+import time
+
+import httpx
+
+from Tbot.bot import TelegramBot
+from Tbot.filters import TargetChats
+
+
+def message(chat_id: int) -> dict:
+    """A reply with a photo, entities and a keyboard, as a busy group sends them."""
+    user = {'id': chat_id, 'is_bot': False, 'first_name': "Ada", 'username': "ada", 'language_code': "en"}
+    chat = {'id': chat_id, 'type': "private", 'first_name': "Ada", 'username': "ada"}
+    return {
+        'message_id': 1000,
+        'from': user,
+        'chat': chat,
+        'date': 1620000000,
+        'reply_to_message': {'message_id': 999, 'from': user, 'chat': chat, 'date': 1619999990, 'text': "earlier"},
+        'caption': "look at this https://example.com #photo @someone",
+        'caption_entities': [
+            {'type': "url", 'offset': 13, 'length': 19},
+            {'type': "hashtag", 'offset': 33, 'length': 6},
+            {'type': "mention", 'offset': 40, 'length': 8},
+        ],
+        'photo': [
+            {'file_id': f"file{i}", 'file_unique_id': f"unique{i}", 'width': 90 * i, 'height': 60 * i, 'file_size': 1000 * i}
+            for i in range(1, 5)
+        ],
+        'reply_markup': {'inline_keyboard': [[{'text': f"button {i}", 'callback_data': f"data {i}"} for i in range(4)]]},
+    }
+
+
+async def measure(client: httpx.AsyncClient, path: str, build, ids, number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        r = await client.post(path, content= json.dumps(build(next(ids))))
+        assert r.status_code == 200, r.text
+    return (time.perf_counter() - started) / number
+
+
+async def run(number: int):
+    bot = TelegramBot("TOKEN", warm_connections= 0)
+    bot.listen("/typed", filters= TargetChats(1))
+    bot.listen("/fast", filters= TargetChats(1), fast_ingest= True)
+
+    @bot.onMessage
+    async def handle(message):
+        pass
+
+    ids = itertools.count()
+    cases = {
+        "rejected by a filter": lambda update_id: {'update_id': update_id, 'message': message(2)},
+        "no handler": lambda update_id: {'update_id': update_id, 'edited_message': message(1)},
+        "handled": lambda update_id: {'update_id': update_id, 'message': message(1)},
+    }
+    transport = httpx.ASGITransport(app= bot.app)
+    async with httpx.AsyncClient(transport= transport, base_url= "http://bot") as client:
+        for name, build in cases.items():
+            for path in ("/typed", "/fast"):
+                await measure(client, path, build, ids, number // 10) # warm up
+                seconds = await measure(client, path, build, ids, number)
+                print(f"{name:<22} {path:<8} {seconds * 1e6:8.1f} us/update")
+
+
+def main(number: int = 5000):
+    asyncio.run(run(number))
+
+
+if __name__ == "__main__":
+    main()